@@ -0,0 +1,173 @@
+import math
+
+import numpy as np
+
+
+class Ewma:
+    """Exponentially weighted mean and variance of a series"""
+
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.mean = None
+        self.var = 0.0
+
+    def update(self, value):
+        if self.mean is None:
+            self.mean = value
+            return
+        delta = value - self.mean
+        self.mean += self.alpha * delta
+        self.var = (1 - self.alpha) * (self.var + self.alpha * delta * delta)
+
+
+class SlidingWindow:
+    """Mean and variance over the last `size` values from running sums"""
+
+    def __init__(self, size):
+        self.data = np.zeros(size)
+        self.count = 0
+        self.total = 0.0
+        self.squares = 0.0
+
+    def __len__(self):
+        return min(self.count, len(self.data))
+
+    def update(self, value):
+        index = self.count % len(self.data)
+        if self.count >= len(self.data):
+            old = self.data[index]
+            self.total -= old
+            self.squares -= old * old
+        self.data[index] = value
+        self.total += value
+        self.squares += value * value
+        self.count += 1
+
+    def stats(self):
+        """Return (mean, variance) of the window"""
+        n = len(self)
+        if not n:
+            return 0.0, 0.0
+        mean = self.total / n
+        return mean, max(self.squares / n - mean * mean, 0.0)
+
+
+class Cusum:
+    """Two-sided CUSUM on standardized values; update() alarms once either sum exceeds `h`"""
+
+    def __init__(self, k=0.5, h=8.0):
+        self.k = k
+        self.h = h
+        self.high = 0.0
+        self.low = 0.0
+
+    def update(self, z):
+        self.high = max(0.0, self.high + z - self.k)
+        self.low = max(0.0, self.low - z - self.k)
+        return self.high > self.h or self.low > self.h
+
+    def reset(self):
+        self.high = self.low = 0.0
+
+
+class AnomalyDetector:
+    """Streaming O(1)-per-update change detector for one series.
+
+    Each value is scored before it updates the statistics: its z-score
+    against an EWMA mean/variance, its z-score against a sliding window
+    of recent values, and a two-sided CUSUM of the EWMA z-score for
+    slow drifts.  A value is abnormal when any test fires; consecutive
+    abnormal values form one segment.  Nothing is flagged during the
+    first `warmup` values.  `min_std` keeps a flat series (e.g. no ACKs
+    at all) from turning the first change into an infinite score.
+    """
+
+    def __init__(self, alpha=0.05, window=120, z_threshold=4.0, cusum_k=0.5, cusum_h=8.0,
+                 warmup=20, min_std=0.05):
+        self.ewma = Ewma(alpha)
+        self.window = SlidingWindow(window)
+        self.cusum = Cusum(cusum_k, cusum_h)
+        self.z_threshold = z_threshold
+        self.warmup = warmup
+        self.min_std = min_std
+        self.samples = 0
+        self.score = 0.0
+
+        # Segment tracking
+        self.abnormal = False
+        self.segment = None  # Open segment: start, end, samples, peak, tests
+        self.segments = 0
+        self.last_segment = None
+
+    def update(self, timestamp, value):
+        """Score one value; returns the closed segment when this value ends one, else None"""
+        ewma_z = window_z = 0.0
+        tests = []
+        if self.samples >= max(self.warmup, 1):
+            ewma_z = (value - self.ewma.mean) / max(math.sqrt(self.ewma.var), self.min_std)
+            mean, var = self.window.stats()
+            window_z = (value - mean) / max(math.sqrt(var), self.min_std)
+            if abs(ewma_z) > self.z_threshold:
+                tests.append('ewma')
+            if abs(window_z) > self.z_threshold:
+                tests.append('window')
+            if self.cusum.update(ewma_z):
+                tests.append('cusum')
+                self.cusum.reset()
+        self.ewma.update(value)
+        self.window.update(value)
+        self.samples += 1
+
+        self.score = float(max(abs(ewma_z), abs(window_z)))
+        self.abnormal = bool(tests)
+        if self.abnormal:
+            if self.segment is None:
+                self.segment = {'start': timestamp, 'samples': 0, 'peak': 0.0, 'tests': []}
+            self.segment['end'] = timestamp
+            self.segment['samples'] += 1
+            self.segment['peak'] = round(max(self.segment['peak'], self.score), 2)
+            self.segment['tests'] = sorted(set(self.segment['tests']) | set(tests))
+            return None
+        closed, self.segment = self.segment, None
+        if closed is not None:
+            self.segments += 1
+            self.last_segment = closed
+        return closed
+
+
+class AckAnomalyMonitor:
+    """One AnomalyDetector per ACK rate statistic, fed from analyze_ack_rate"""
+
+    def __init__(self, series=('acks_per_refresh', 'acks_per_second'), **options):
+        self.detectors = {name: AnomalyDetector(**options) for name in series}
+
+    def update(self, stats):
+        """Score one analyze_ack_rate result; returns log events for segments that opened or closed"""
+        events = []
+        for name, detector in self.detectors.items():
+            was_open = detector.segment is not None
+            closed = detector.update(stats['elapsed_time'], stats[name])
+            if detector.segment is not None and not was_open:
+                events.append({'event': 'anomaly_start', 'series': name, 'start': stats['elapsed_time'],
+                               'value': stats[name], 'score': round(detector.score, 2),
+                               'tests': detector.segment['tests']})
+            if closed is not None:
+                events.append(dict({'event': 'anomaly_end', 'series': name}, **closed))
+        return events
+
+    def abnormal(self):
+        """Names of the series currently inside an abnormal segment"""
+        return [name for name, detector in self.detectors.items() if detector.abnormal]
+
+    def lines(self):
+        lines = []
+        for name, detector in self.detectors.items():
+            state = "ABNORMAL " + "+".join(detector.segment['tests']) if detector.abnormal else "normal"
+            mean = detector.ewma.mean if detector.ewma.mean is not None else 0.0
+            lines.append(f"{name}: {state} (z {detector.score:.1f}, "
+                         f"mean {mean:.2f}, segments {detector.segments})")
+            if detector.last_segment is not None:
+                segment = detector.last_segment
+                lines.append(f"  last: {segment['start']}s-{segment['end']}s peak z {segment['peak']} "
+                             f"({'+'.join(segment['tests'])})")
+        return lines
@@ -0,0 +1,343 @@
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+import argparse
+import tracemalloc
+from datetime import datetime, timedelta
+import cv2
+import numpy as np
+
+from grid import active_cells
+from logwriter import LogWriter
+from replay import load_decoder
+
+RESOLUTIONS = {
+    '480p': (640, 480),
+    '720p': (1280, 720),
+    '1080p': (1920, 1080),
+}
+
+STARTUP_BUDGET_MS = 1000
+
+# Run in a fresh interpreter so the decoder's imports are not already cached
+STARTUP_SCRIPT = """
+import sys, json, time
+began = time.perf_counter()
+from replay import load_decoder
+communicator_class = load_decoder(sys.argv[1])
+imported = time.perf_counter()
+communicator = communicator_class(headless=True, seed=0)
+communicator.status_update_interval = float('inf')
+constructed = time.perf_counter()
+from benchmark import SyntheticSource
+source = SyntheticSource(int(sys.argv[2]), int(sys.argv[3]), 2, cycle=2)
+generated = time.perf_counter()
+while communicator.total_frames < 2:
+    communicator.process_frame(source.read()[1])
+done = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - began) * 1000,
+    'construct_ms': (constructed - imported) * 1000,
+    'first_frame_ms': (done - generated) * 1000,
+    'total_ms': (done - began - (generated - constructed)) * 1000,
+    'matplotlib_loaded': 'matplotlib' in sys.modules,
+}))
+"""
+
+
+class SyntheticSource:
+    """Generate frames with motion in a controllable share and region of the grid.
+
+    `density` is the fraction of grid cells inside `region` that change
+    between consecutive frames.  `region` is (top, left, bottom, right)
+    as fractions of the frame.  A small cycle of frames is rendered up
+    front and replayed, so generation cost stays out of the measurement.
+    """
+
+    def __init__(self, width, height, frames, rows=8, cols=16, density=0.05,
+                 region=(0.0, 0.0, 1.0, 1.0), seed=0, cycle=16):
+        self.frames = frames
+        self.index = 0
+        rng = np.random.default_rng(seed)
+        cell_h, cell_w = height // rows, width // cols
+        top, left, bottom, right = region
+        candidates = [
+            (row, col)
+            for row in range(int(top * rows), max(int(bottom * rows), int(top * rows) + 1))
+            for col in range(int(left * cols), max(int(right * cols), int(left * cols) + 1))
+        ]
+        moving = max(0, min(len(candidates), round(density * len(candidates))))
+
+        self.cycle = []
+        background = np.full((height, width, 3), 64, dtype=np.uint8)
+        for step in range(cycle):
+            frame = background.copy()
+            for index in rng.choice(len(candidates), moving, replace=False):
+                row, col = candidates[index]
+                # Alternate brightness so every chosen cell differs from the previous frame
+                value = 224 if (step + row + col) % 2 else 16
+                frame[row * cell_h:(row + 1) * cell_h, col * cell_w:(col + 1) * cell_w] = value
+            self.cycle.append(frame)
+
+    def read(self, image=None):
+        if self.index >= self.frames:
+            return False, None
+        frame = self.cycle[self.index % len(self.cycle)]
+        self.index += 1
+        if image is not None and image.shape == frame.shape:
+            image[...] = frame
+            return True, image
+        return True, frame.copy()
+
+    def release(self):
+        self.index = self.frames
+
+
+def percentile_summary(samples):
+    """Return latency percentiles in milliseconds"""
+    values = np.asarray(samples) * 1000
+    if not len(values):
+        return {}
+    return {
+        'mean': round(float(values.mean()), 3),
+        'p50': round(float(np.percentile(values, 50)), 3),
+        'p95': round(float(np.percentile(values, 95)), 3),
+        'p99': round(float(np.percentile(values, 99)), 3),
+        'max': round(float(values.max()), 3),
+    }
+
+
+def run_case(decoder, resolution, rows, cols, frames, density, region, warmup=10, seed=0, gate=True,
+             memory_frames=50):
+    """Drive one decoder headlessly over a synthetic sequence and measure it.
+
+    Throughput and latency come from an untraced pass; peak memory from a
+    second, shorter pass over the same sequence with tracemalloc on,
+    which would otherwise roughly halve the measured frame rate.
+    """
+    width, height = RESOLUTIONS[resolution]
+    source = SyntheticSource(width, height, frames + warmup, rows, cols, density, region, seed)
+    communicator = load_decoder(decoder)(headless=True)
+    communicator.grid_rows = rows
+    communicator.grid_cols = cols
+    # Require a quarter of the cell to change, whatever the grid size
+    communicator.sensitivity = (height // rows) * (width // cols) // 4
+    # Keep the terminal status out of the measurement
+    communicator.status_update_interval = float('inf')
+    # Keep qubox's ghost protocol countdown from ending the run early
+    communicator.ghostprotocol = 10 ** 9
+    if not gate:
+        communicator.motion.gate = None
+
+    for _ in range(warmup):
+        ret, frame = source.read()
+        communicator.process_frame(frame)
+
+    latencies = []
+    start = time.perf_counter()
+    while True:
+        ret, frame = source.read()
+        if not ret:
+            break
+        began = time.perf_counter()
+        communicator.process_frame(frame)
+        latencies.append(time.perf_counter() - began)
+    elapsed = time.perf_counter() - start
+    result = {
+        'decoder': decoder,
+        'resolution': resolution,
+        'grid': f"{rows}x{cols}",
+        'density': density,
+        'region': list(region),
+        'frames': len(latencies),
+        'fps': round(len(latencies) / elapsed, 1) if elapsed > 0 else 0,
+        'latency_ms': percentile_summary(latencies),
+        'stages_ms': communicator.timer.summary(),
+        'gate': communicator.motion.gate.stats() if communicator.motion.gate is not None else None,
+        'motion_frames': communicator.motion_frame_count,
+        'ack': communicator.ack,
+        'nul': communicator.nul,
+    }
+
+    source = SyntheticSource(width, height, min(frames, memory_frames), rows, cols, density, region, seed)
+    tracemalloc.start()
+    while True:
+        ret, frame = source.read()
+        if not ret:
+            break
+        communicator.process_frame(frame)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    result['memory_frames'] = min(frames, memory_frames)
+    result['peak_memory_mb'] = round(peak / 2 ** 20, 2)
+    return result
+
+
+def startup_case(decoder, resolution, repeat=5):
+    """Time import -> construct -> first diffed frame in fresh interpreters; median of `repeat` runs"""
+    width, height = RESOLUTIONS[resolution]
+    here = os.path.dirname(os.path.abspath(__file__))
+    runs = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT, decoder, str(width), str(height)],
+                                cwd=here, capture_output=True, text=True, check=True).stdout
+        run = json.loads(output.strip().splitlines()[-1])
+        run['process_ms'] = (time.perf_counter() - began) * 1000
+        runs.append(run)
+    median = {key: round(float(np.median([run[key] for run in runs])), 1)
+              for key in ('import_ms', 'construct_ms', 'first_frame_ms', 'total_ms', 'process_ms')}
+    return {
+        'decoder': decoder,
+        'resolution': resolution,
+        'runs': repeat,
+        **median,
+        'matplotlib_loaded': any(run['matplotlib_loaded'] for run in runs),
+    }
+
+
+def decoder_state(communicator):
+    """Everything apply_quantum_logic can change, for exact comparisons"""
+    from checkpoint import STATE
+    state = {name: getattr(communicator, name) for name in STATE if hasattr(communicator, name)}
+    state.update(
+        last_or_state_time=communicator.last_or_state_time,
+        last_and_state_time=getattr(communicator, 'last_and_state_time', None),
+        ghost_messages=list(communicator.ghost_messages),
+        rng=communicator.rng.bit_generator.state,
+        numa_length=len(communicator.numa),
+    )
+    binary = getattr(communicator, 'binary', None)
+    if binary is not None:
+        state.update(bits=len(binary), pending=binary.pending)
+    return state
+
+
+def verify_batched(decoder, frames=2000, rows=8, cols=16, seed=0):
+    """Drive apply_frame and per-cell apply_quantum_logic with the same random masks and clock.
+
+    Frames mix empty, sparse, dense and full masks, and the clock advances
+    by random steps so OR/AND durations cross their thresholds.  The full
+    decoder state is compared after every frame; returns the first
+    mismatching frame (None when equivalent) and the time spent on each path.
+    """
+    rng = np.random.default_rng(seed)
+    communicator_class = load_decoder(decoder)
+    batched = communicator_class(headless=True, seed=seed)
+    per_cell = communicator_class(headless=True, seed=seed)
+    batched.log = per_cell.log = LogWriter(None)
+    now, wall = 0.0, datetime(2000, 1, 1)
+    batched_time = per_cell_time = 0.0
+    mismatch = None
+    for frame in range(frames):
+        density = rng.choice((0.0, 0.02, 0.1, 0.3, 0.6, 1.0))
+        cells = list(active_cells(rng.random((rows, cols)) < density))
+        step = float(rng.exponential(1.0))
+        now, wall = now + step, wall + timedelta(seconds=step)
+        for communicator in (batched, per_cell):
+            communicator.monotonic = lambda now=now: now
+            communicator.clock = lambda wall=wall: wall
+
+        began = time.perf_counter()
+        batched.apply_frame(cells)
+        batched_time += time.perf_counter() - began
+
+        began = time.perf_counter()
+        for row, col in cells:
+            per_cell.apply_quantum_logic(row, col)
+            if not per_cell.running:
+                break
+        per_cell_time += time.perf_counter() - began
+
+        if decoder_state(batched) != decoder_state(per_cell):
+            mismatch = frame
+            break
+        if not per_cell.running:
+            break
+    return {
+        'decoder': decoder,
+        'seed': seed,
+        'frames': frame + 1,
+        'ack': batched.ack,
+        'nul': batched.nul,
+        'running': batched.running,
+        'first_mismatch': mismatch,
+        'batched_ms': round(batched_time * 1000, 2),
+        'per_cell_ms': round(per_cell_time * 1000, 2),
+    }
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'machine': platform.machine(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def parse_grid(text):
+    rows, cols = text.lower().split('x')
+    return int(rows), int(cols)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the qubox and comms pipelines on synthetic motion")
+    parser.add_argument("--decoders", nargs="+", default=["qubox", "comms"], choices=("qubox", "comms"))
+    parser.add_argument("--resolutions", nargs="+", default=list(RESOLUTIONS), choices=list(RESOLUTIONS))
+    parser.add_argument("--grids", nargs="+", default=[(8, 16), (16, 32)], type=parse_grid)
+    parser.add_argument("--densities", nargs="+", default=[0.0, 0.05, 0.25], type=float)
+    parser.add_argument("--region", default="0,0,1,1", help="top,left,bottom,right as fractions of the frame")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    parser.add_argument("--no-gate", action="store_true", help="disable the quiet-frame motion gate")
+    parser.add_argument("--equivalence", type=int, metavar="SEEDS",
+                        help="check apply_frame against per-cell updates over this many seeds instead")
+    parser.add_argument("--startup", action="store_true",
+                        help="measure import -> first processed frame instead of throughput")
+    parser.add_argument("--startup-budget", type=float, default=STARTUP_BUDGET_MS,
+                        help="fail when the median startup exceeds this many milliseconds")
+    args = parser.parse_args()
+
+    region = tuple(float(value) for value in args.region.split(','))
+    results = {'environment': environment(), 'runs': []}
+    if args.equivalence:
+        results['equivalence'] = [verify_batched(decoder, args.frames * 10, seed=seed)
+                                  for decoder in args.decoders for seed in range(args.equivalence)]
+        for case in results['equivalence']:
+            print(f"{case['decoder']} seed={case['seed']}: {case['frames']} frames, "
+                  f"mismatch at {case['first_mismatch']}, batched {case['batched_ms']} ms, "
+                  f"per-cell {case['per_cell_ms']} ms", file=sys.stderr)
+    elif args.startup:
+        results['startup_budget_ms'] = args.startup_budget
+        results['startup'] = [startup_case(decoder, resolution)
+                              for decoder in args.decoders for resolution in args.resolutions]
+        for case in results['startup']:
+            print(f"{case['decoder']} {case['resolution']}: startup {case['total_ms']} ms "
+                  f"(import {case['import_ms']}, first frame {case['first_frame_ms']}, "
+                  f"process {case['process_ms']})", file=sys.stderr)
+    for decoder in (() if args.startup or args.equivalence else args.decoders):
+        for resolution in args.resolutions:
+            for rows, cols in args.grids:
+                for density in args.densities:
+                    case = run_case(decoder, resolution, rows, cols, args.frames, density, region, gate=not args.no_gate)
+                    results['runs'].append(case)
+                    print(f"{decoder} {resolution} {case['grid']} density={density}: "
+                          f"{case['fps']} fps, p95 {case['latency_ms'].get('p95')} ms", file=sys.stderr)
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+    if args.equivalence and any(case['first_mismatch'] is not None for case in results['equivalence']):
+        print("apply_frame diverges from per-cell apply_quantum_logic", file=sys.stderr)
+        sys.exit(1)
+    if args.startup and any(case['total_ms'] > args.startup_budget for case in results['startup']):
+        print(f"startup exceeds the {args.startup_budget} ms budget", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,55 @@
+class BitStream:
+    """Append-only decoded bit stream with constant memory.
+
+    Bits are packed MSB-first into bytes; each completed byte is handed
+    to `sink` (any callable taking ``bytes``, e.g. ``file.write``) and
+    not kept.  The most recent `window` bits stay available as ASCII
+    '0'/'1' in a ring buffer for status display and incremental logs.
+    """
+
+    def __init__(self, sink=None, window=4096):
+        self.sink = sink
+        self.ring = bytearray(window)
+        self.length = 0
+        self.pending = 0  # Bits of the byte being assembled
+        self.bytes_emitted = 0
+
+    def __len__(self):
+        return self.length
+
+    def append(self, bit):
+        bit = 1 if bit else 0
+        self.ring[self.length % len(self.ring)] = 48 + bit
+        self.length += 1
+        self.pending = (self.pending << 1) | bit
+        if self.length % 8 == 0:
+            if self.sink is not None:
+                self.sink(bytes((self.pending,)))
+            self.bytes_emitted += 1
+            self.pending = 0
+
+    def since(self, offset):
+        """Return bits from absolute position `offset` that are still in the window"""
+        start = max(offset, self.length - len(self.ring), 0)
+        if start >= self.length:
+            return ""
+        size = len(self.ring)
+        head, tail = start % size, self.length % size
+        view = memoryview(self.ring)
+        if head < tail or tail == 0:
+            return view[head:tail or size].tobytes().decode("ascii")
+        return (view[head:].tobytes() + view[:tail].tobytes()).decode("ascii")
+
+    def recent(self, count=64):
+        """Return the last `count` bits as a '0'/'1' string"""
+        return self.since(self.length - count)
+
+    def __str__(self):
+        return self.recent(len(self.ring))
+
+
+def ascii_sink(write, replacement=b"."):
+    """Wrap a bytes sink so non-printable decoded bytes are replaced"""
+    def sink(data):
+        write(bytes(b if 32 <= b < 127 or b in (9, 10, 13) else replacement[0] for b in data))
+    return sink
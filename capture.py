@@ -0,0 +1,144 @@
+import threading
+from collections import deque
+
+DROP_OLDEST = "drop-oldest"
+BLOCK = "block"
+
+
+class FrameRing:
+    """Fixed-size ring of preallocated frame buffers shared by one producer and one consumer"""
+
+    def __init__(self, size=4, policy=DROP_OLDEST):
+        if policy not in (DROP_OLDEST, BLOCK):
+            raise ValueError(f"Unknown drop policy: {policy}")
+        self.size = size
+        self.policy = policy
+        self.buffers = [None] * size
+        self.free = deque(range(size))
+        self.ready = deque()
+        self.closed = False
+        self.cond = threading.Condition()
+
+        # Counters
+        self.captured = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    @property
+    def depth(self):
+        return len(self.ready)
+
+    def acquire(self):
+        """Return a free slot index for the producer, or None once closed"""
+        with self.cond:
+            while not self.free and not self.closed:
+                if self.policy == DROP_OLDEST and self.ready:
+                    self.free.append(self.ready.popleft())
+                    self.dropped += 1
+                else:
+                    self.cond.wait()
+            if self.closed:
+                return None
+            return self.free.popleft()
+
+    def publish(self, slot):
+        """Hand a filled slot to the consumer"""
+        with self.cond:
+            self.ready.append(slot)
+            self.captured += 1
+            self.max_depth = max(self.max_depth, len(self.ready))
+            self.cond.notify_all()
+
+    def get(self, timeout=None):
+        """Return the oldest filled slot index, or None when closed and drained"""
+        with self.cond:
+            while not self.ready and not self.closed:
+                if not self.cond.wait(timeout):
+                    return None
+            if not self.ready:
+                return None
+            return self.ready.popleft()
+
+    def release(self, slot):
+        """Return a consumed slot to the free list"""
+        with self.cond:
+            self.free.append(slot)
+            self.cond.notify_all()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def stats(self):
+        return {
+            'captured': self.captured,
+            'dropped': self.dropped,
+            'depth': self.depth,
+            'max_depth': self.max_depth,
+            'size': self.size,
+            'policy': self.policy,
+        }
+
+
+class CaptureThread(threading.Thread):
+    """Producer that reads frames from a capture source into a FrameRing"""
+
+    def __init__(self, capture, ring):
+        super().__init__(daemon=True)
+        self.capture = capture
+        self.ring = ring
+
+    def run(self):
+        try:
+            while True:
+                slot = self.ring.acquire()
+                if slot is None:
+                    break
+                buffer = self.ring.buffers[slot]
+                ret, frame = self.capture.read(buffer) if buffer is not None else self.capture.read()
+                if not ret:
+                    self.ring.release(slot)
+                    break
+                if frame is not buffer:
+                    # First frame, or the source changed shape: (re)allocate the slot
+                    if buffer is None or buffer.shape != frame.shape or buffer.dtype != frame.dtype:
+                        buffer = frame.copy()
+                        self.ring.buffers[slot] = buffer
+                    else:
+                        buffer[...] = frame
+                self.ring.publish(slot)
+        finally:
+            self.ring.close()
+
+    def stop(self):
+        self.ring.close()
+
+
+def threaded_frames(capture, ring):
+    """Yield frames produced on a capture thread; each frame is valid until the next one is requested"""
+    producer = CaptureThread(capture, ring)
+    producer.start()
+    slot = None
+    try:
+        while True:
+            slot = ring.get()
+            if slot is None:
+                break
+            yield ring.buffers[slot]
+            ring.release(slot)
+            slot = None
+    finally:
+        if slot is not None:
+            ring.release(slot)
+        producer.stop()
+        producer.join()
+
+
+def direct_frames(capture):
+    """Yield frames read synchronously from the capture source"""
+    while True:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        yield frame
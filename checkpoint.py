@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import zipfile
+import threading
+
+import numpy as np
+
+from sequence import SENTINEL, NumaSequence
+
+VERSION = 2
+
+# Decoder attributes saved when the communicator has them
+STATE = (
+    'Do', 'Do2', 'qu', 'it', 'and_count', 'or_count', 'cyc', 'swi', 'longcyc', 'corr',
+    'prime', 'prime_threshold', 'ghostprotocol', 'ghostprotocollast', 'GhostIterate',
+    'testchecknum', 'PIN', 'range', 'seed', 'ack', 'nul', 'last_ack_count',
+    'motion_frame_count', 'total_frames', 'i', 'logged_bits', 'running',
+)
+
+# Open OR/AND state start times; monotonic readings, saved as their age at the snapshot
+STATE_TIMES = ('last_or_state_time', 'last_and_state_time')
+
+
+def pack_numa(values):
+    """Pack a 0/1/SENTINEL sequence into bits plus (start, count) runs of sentinels"""
+    values = np.asarray(values, dtype=np.uint8)
+    sentinel = values == SENTINEL
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], sentinel.view(np.int8), [0]))))
+    runs = np.stack((edges[0::2], edges[1::2] - edges[0::2]), axis=1) if len(edges) else np.empty((0, 2), np.int64)
+    return np.packbits(values == 1), runs.astype(np.int64)
+
+
+def unpack_numa(bits, length, runs):
+    values = np.unpackbits(bits, count=length)
+    for start, count in runs:
+        values[start:start + count] = SENTINEL
+    return values
+
+
+def snapshot(communicator):
+    """Copy the decoder state; cheap enough to call between frames on the decode thread"""
+    state = {name: getattr(communicator, name) for name in STATE if hasattr(communicator, name)}
+    state['decoder'] = communicator.name
+    now = communicator.monotonic()
+    state['state_ages'] = {}
+    for name in STATE_TIMES:
+        if hasattr(communicator, name):
+            started = getattr(communicator, name)
+            state['state_ages'][name] = None if started is None else now - started
+    state['rng'] = communicator.rng.bit_generator.state
+    state['ghost_messages'] = list(communicator.ghost_messages)
+    state['saved_at'] = time.time()
+    arrays = {'numa': np.array(communicator.numa, copy=True)}  # Never a view of the live buffer
+    binary = getattr(communicator, 'binary', None)
+    if binary is not None:
+        state['binary'] = {'length': binary.length, 'pending': binary.pending, 'bytes_emitted': binary.bytes_emitted}
+        arrays['binary_ring'] = np.frombuffer(bytes(binary.ring), dtype=np.uint8)
+    return state, arrays
+
+
+def write(path, state, arrays):
+    """Write a snapshot atomically: temporary file, fsync, then rename over `path`"""
+    bits, runs = pack_numa(arrays['numa'])
+    payload = {
+        'meta': np.frombuffer(json.dumps(dict(state, version=VERSION, numa_length=len(arrays['numa']))).encode(),
+                              dtype=np.uint8),
+        'numa_bits': bits,
+        'numa_sentinels': runs,
+    }
+    if 'binary_ring' in arrays:
+        payload['binary_ring'] = arrays['binary_ring']
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp = f"{path}.{os.getpid()}.tmp"
+    with open(temp, "wb") as f:
+        np.savez(f, **payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+
+
+def load(path):
+    """Read a checkpoint; returns (state, numa values, bit stream ring or None)"""
+    try:
+        with np.load(path) as data:
+            state = json.loads(data['meta'].tobytes())
+            if state.get('version') != VERSION:
+                raise ValueError(f"Unsupported checkpoint version: {state.get('version')}")
+            numa = unpack_numa(data['numa_bits'], state['numa_length'], data['numa_sentinels'])
+            ring = data['binary_ring'].tobytes() if 'binary_ring' in data.files else None
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"Damaged checkpoint: {e}") from e
+    return state, numa, ring
+
+
+def apply(communicator, state, numa, ring=None):
+    """Put loaded checkpoint state into a freshly constructed communicator of the same decoder.
+
+    Everything is read and checked before the communicator is touched, so
+    a damaged checkpoint raises (ValueError, KeyError or TypeError) and
+    leaves the communicator as it was.
+    """
+    if state['decoder'] != communicator.name:
+        raise ValueError(f"Checkpoint is from the {state['decoder']} decoder, not {communicator.name}")
+    values = {name: state[name] for name in STATE if name in state}
+    now = communicator.monotonic()
+    for name, age in state['state_ages'].items():
+        values[name] = None if age is None else now - age
+    sequence = NumaSequence(numa)
+    rng = np.random.Generator(type(communicator.rng.bit_generator)())
+    rng.bit_generator.state = state['rng']
+    messages = list(state['ghost_messages'])
+    binary = getattr(communicator, 'binary', None)
+    if binary is not None and 'binary' in state and ring is not None and len(ring) == len(binary.ring):
+        counters = {name: state['binary'][name] for name in ('length', 'pending', 'bytes_emitted')}
+    else:
+        binary = None
+
+    for name, value in values.items():
+        setattr(communicator, name, value)
+    communicator.numa = sequence
+    communicator.rng = rng
+    communicator.ghost_messages.clear()
+    communicator.ghost_messages.extend(messages)
+    if binary is not None:
+        binary.ring[:] = ring
+        for name, value in counters.items():
+            setattr(binary, name, value)
+
+
+def restore(communicator, path):
+    """Load the checkpoint at `path` into the communicator; returns its metadata"""
+    state, numa, ring = load(path)
+    apply(communicator, state, numa, ring)
+    return state
+
+
+class Checkpointer:
+    """Periodic atomic checkpoints of a communicator, written on a background thread.
+
+    ``maybe()`` is called from the decode thread (display_status does
+    this); once `interval` seconds have passed it takes a snapshot, which
+    only copies scalars and the numa buffer, and hands it to the writer
+    thread.  Packing and disk I/O never run on the hot path; if the
+    writer is still busy, only the newest snapshot is kept.  Each decoder
+    has its own default path, and a checkpoint only resumes the decoder
+    that wrote it.
+    """
+
+    def __init__(self, communicator, path=None, interval=30.0):
+        self.communicator = communicator
+        self.path = os.path.join('logs', f'{communicator.name}-checkpoint.npz') if path is None else path
+        self.interval = interval
+        self.last = time.monotonic()
+        self.pending = None
+        self.event = threading.Event()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.running = False
+        self.written = 0
+
+    def maybe(self):
+        now = time.monotonic()
+        if now - self.last < self.interval:
+            return
+        self.last = now
+        self.submit()
+
+    def submit(self):
+        """Queue a snapshot of the current state for the writer thread"""
+        if self.thread is None:
+            self.running = True
+            self.thread = threading.Thread(target=self._run, name="Checkpointer", daemon=True)
+            self.thread.start()
+        self.pending = snapshot(self.communicator)
+        self.event.set()
+
+    def _run(self):
+        while self.running:
+            self.event.wait()
+            self.event.clear()
+            self._write_pending()
+
+    def _write_pending(self):
+        with self.lock:
+            pending, self.pending = self.pending, None
+            if pending is not None:
+                write(self.path, *pending)
+                self.written += 1
+
+    def close(self, final=True):
+        """Write a last checkpoint (when `final`) and stop the writer thread"""
+        if final:
+            self.pending = snapshot(self.communicator)
+        if self.thread is not None:
+            self.running = False
+            self.event.set()
+            self.thread.join()
+            self.thread = None
+        self._write_pending()
+
+    def resume(self):
+        """Restore the latest checkpoint of an unfinished run; returns its metadata or None"""
+        if not os.path.exists(self.path):
+            return None
+        state, numa, ring = load(self.path)
+        if not state.get('running', True):
+            return None  # qubox's ghost protocol already ended that run
+        apply(self.communicator, state, numa, ring)
+        return state
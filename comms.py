@@ -4,13 +4,25 @@ import os
 from datetime import datetime
 from collections import deque
 import random
+import time
+from sequence import generate_numa
+from grid import cell_bounds, active_cells
+from capture import FrameRing, threaded_frames, direct_frames
+from timing import StageTimer
+from motion import MotionDetector
+from logwriter import LogWriter
+from bitstream import BitStream
+from status import StatusRenderer
+from anomaly import AckAnomalyMonitor
 new_message = "test"
 class QuantumCommunicator:
-    def __init__(self, sensitivity=500):
+    name = "comms"  # Decoder name; the module is __main__ when run as a script
+    
+    def __init__(self, sensitivity=500, capture=None, headless=False, seed=None, numa_cache=None):
         # Camera and processing setup
         self.sensitivity = sensitivity
-        self.data2 = None
-        self.capture = cv2.VideoCapture(0)
+        self.capture = capture  # Opened on cv2.VideoCapture(0) when None
+        self.headless = headless
         
         # Initialize quantum state variables
         self.Do = 0
@@ -22,7 +34,10 @@ class QuantumCommunicator:
         self.cyc = 0
         self.swi = 0
         self.longcyc = 3
-        self.numa = ",".join(str(np.random.randint(0, 2)) for _ in range(100000))
+        # Fresh OS entropy unless a seed is given; logged so the run can be reproduced
+        self.seed = int(np.random.SeedSequence().entropy) if seed is None else seed
+        self.rng = np.random.default_rng(self.seed)
+        self.numa = generate_numa(100000, self.seed, numa_cache)
         self.corr = 3
         self.prime = 0
         self.ghostprotocol = 0
@@ -34,7 +49,9 @@ class QuantumCommunicator:
         self.nul = 0
         self.last_ack_count = 0
         self.start_time = datetime.now()
-        self.ack_history = []
+        self.ack_history = deque(maxlen=1024)
+        self.anomalies = AckAnomalyMonitor()  # Flags abnormal ACK rate segments as they happen
+        self.anomaly_events = []
         
         # Status tracking variables
         self.motion_frame_count = 0
@@ -42,7 +59,35 @@ class QuantumCommunicator:
         self.last_status_update = datetime.now()
         self.status_update_interval = 0.5
         self.total_frames = 0
-        self.binary = ""
+        self.grid_rows = 8
+        self.grid_cols = 16
+        self.band = (4, 11)  # Exclusive row/col bounds for the OR/AND gates
+        self.clock = datetime.now  # Wall time for message text; replaced by recorded time during event replay
+        self.monotonic = time.monotonic  # Time base of OR/AND durations; likewise replaced during event replay
+        self.recorder = None  # Optional events.EventRecorder of per-frame masks
+        self.running = True  # Cleared when the decoder is done; callers stop feeding frames
+        self.checkpointer = None  # Optional checkpoint.Checkpointer, driven from display_status
+        
+        # Capture stage: producer thread filling a ring of preallocated frames
+        self.threaded_capture = True
+        self.ring = FrameRing(size=4, policy="drop-oldest")
+        self.capture_stats = self.ring.stats  # Read by the status view and metrics; runtime.AsyncRunner swaps in its own
+        
+        # Per-stage hot-path timings
+        self.timer = StageTimer(enabled=True)
+        
+        # Motion front end: motion.gate skips clearly quiet frames (None disables),
+        # motion.reduced takes an optional reduced.ReducedPipeline
+        self.motion = MotionDetector(self.timer)
+        
+        # In-place terminal status, drawn on its own thread
+        self.status = StatusRenderer(threaded=True)
+        
+        # Batched JSON Lines log written on a background thread; one file per decoder
+        self.log = LogWriter(os.path.join('logs', 'comms.jsonl'))
+        self.seed_logged = False
+        self.binary = BitStream()  # Completed bytes go to binary.sink when set
+        self.logged_bits = 0
         # Ghost protocol variables
         self.ghost_messages = deque(maxlen=4)
         self.range = 10
@@ -75,112 +120,194 @@ class QuantumCommunicator:
         # Update tracking variables
         self.last_ack_count = self.ack
         self.ack_history.append(stats)
+        self.anomaly_events.extend(self.anomalies.update(stats))
+        stats['abnormal'] = self.anomalies.abnormal()
         
         return stats
 
-    def clear_console(self):
-        """Clear the console screen"""
-        os.system('cls' if os.name == 'nt' else 'clear')
-
     def display_status(self):
         """Display current status information with ACK rate analysis"""
         current_time = datetime.now()
         if (current_time - self.last_status_update).total_seconds() < self.status_update_interval:
             return
             
-        self.clear_console()
+        began = self.timer.start()
         ack_stats = self.analyze_ack_rate()
+        lines = []
 
         
-        print(self.binary)
-       
+        lines.append(f"Bits decoded: {len(self.binary)} ({self.binary.bytes_emitted} bytes)")
+        lines.append(self.binary.recent(64))
+        for line in self.anomalies.lines():
+            lines.append(line)
+        self.status.submit(lines)
         
+        self.timer.stop('display_status', began)
         
         # Log ACK stats to file
-        self.log_ack_stats(ack_stats)
+        with self.timer('log_ack_stats'):
+            self.log_ack_stats(ack_stats)
         
         self.last_status_update = current_time
         self.active_quadrants.clear()
+        
+        # Periodic checkpoint; the snapshot is written on the checkpointer's thread
+        if self.checkpointer is not None:
+            self.checkpointer.maybe()
 
     def log_ack_stats(self, stats):
         """Log ACK statistics and ghost protocol messages to a file"""
-        current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        log_entry = (
-self.binary
-        )
+        if not self.seed_logged:
+            self.log.write({'event': 'run_started', 'time': datetime.now().isoformat(timespec='seconds'), 'seed': self.seed})
+            self.seed_logged = True
         
-       
+        # Abnormal ACK rate segments as they open and close
+        for event in self.anomaly_events:
+            self.log.write(dict(event, time=datetime.now().isoformat(timespec='seconds')))
+        self.anomaly_events.clear()
         
-        log_entry += "\n\n"
+        # Only the bits decoded since the previous entry are written
+        new_bits = self.binary.since(self.logged_bits)
+        if not new_bits:
+            return
         
-        with open("ack_stats.log", "a") as f:
-            f.write(log_entry)
+        self.log.write({
+            'event': 'bits',
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'offset': self.logged_bits,
+            'bits': new_bits,
+        })
+        self.logged_bits = len(self.binary)
 
     def process_camera(self):
         """Process camera feed and detect motion in quadrants"""
-        while True:
-            ret, frame = self.capture.read()
-            if not ret:
+        if self.capture is None:
+            self.capture = cv2.VideoCapture(0)
+        
+        if self.threaded_capture:
+            frames = threaded_frames(self.capture, self.ring)
+        else:
+            frames = direct_frames(self.capture)
+        
+        for frame in frames:
+            self.process_frame(frame)
+            if not self.running:
                 break
-            
-            self.total_frames += 1
-            
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            gray = cv2.GaussianBlur(gray, (21, 21), 0)
-            
-            if self.data2 is None:
-                self.data2 = gray
+            if self.headless:
                 continue
             
-            self.process_motion(frame, gray)
-            self.data2 = gray
-            
-            # Display status in command line
-            self.display_status()
-            
             # Display the resulting frame
             cv2.imshow('Motion Detection', frame)
             
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 break
         
+        frames.close()
         self.capture.release()
-        cv2.destroyAllWindows()
+        if not self.headless:
+            cv2.destroyAllWindows()
 
-    def process_motion(self, current_frame, gray_frame):
-        """Process motion detection and quantum logic"""
-        frame_delta = cv2.absdiff(self.data2, gray_frame)
-        thresh = cv2.threshold(frame_delta, 25, 255, cv2.THRESH_BINARY)[1]
+    def process_frame(self, frame):
+        """Run one frame through grayscale, blur, motion detection and status"""
+        mask, audit = self.detect_motion(frame)
+        if mask is not None:
+            self.decode_motion(mask, frame, audit)
         
-        motion_detected_in_frame = False
+        # Display status in command line
+        self.display_status()
+
+    def detect_motion(self, frame):
+        """Run one frame through the motion front end; returns (mask, audit).
         
-        height, width = thresh.shape
-        quadrant_width = width // 16
-        quadrant_height = height // 8
+        The mask is None for the first frame and all False for frames the
+        gate skips.  Only the motion pipeline state is touched, so
+        runtime.AsyncRunner calls this on a worker thread while the
+        previous mask is decoded.
+        """
+        self.total_frames += 1
+        counts, audit = self.motion.counts(frame, self.sensitivity, self.grid_rows, self.grid_cols)
+        if counts is None:
+            return None, False
         
-        for row in range(8):
-            for col in range(16):
+        reduced = self.motion.reduced
+        mask = counts > (self.sensitivity if reduced is None else reduced.sensitivity(self.sensitivity))
+        if self.recorder is not None:
+            # Counts are recorded in full-resolution pixels whatever pipeline produced them
+            self.recorder.record(self.total_frames, time.monotonic(), mask,
+                                 counts if reduced is None else reduced.full_counts(counts))
+        return mask, audit
+
+    def decode_motion(self, mask, frame=None, audit=False):
+        """Apply quantum logic for the mask's active cells; headless runs skip the highlights"""
+        motion_frames = self.motion_frame_count
+        with self.timer('decode'):
+            self.apply_motion_mask(mask, None if self.headless else frame)
+        if audit:
+            self.motion.gate.record_audit(self.motion_frame_count > motion_frames)
+
+    def process_counts(self, counts, current_frame=None):
+        """Apply per-cell motion counts computed by a shared front end"""
+        self.total_frames += 1
+        with self.timer('decode'):
+            self.apply_motion_mask(counts > self.sensitivity, current_frame)
+        self.display_status()
+
+    def apply_motion_mask(self, mask, current_frame=None):
+        """Apply quantum logic and highlighting for every active cell in the mask"""
+        if not self.running or not mask.any():
+            return
+        
+        self.motion_frame_count += 1
+        if current_frame is not None:
+            quadrant_height, quadrant_width = cell_bounds(current_frame.shape, *mask.shape)
+        
+        cells = list(active_cells(mask))
+        self.active_quadrants.update(cells)
+        self.apply_frame(cells)
+        if current_frame is not None:
+            for row, col in cells:
                 x1 = col * quadrant_width
                 y1 = row * quadrant_height
-                x2 = (col + 1) * quadrant_width
-                y2 = (row + 1) * quadrant_height
-                
-                quadrant = thresh[y1:y2, x1:x2]
-                motion_detected = np.sum(quadrant > 10) > self.sensitivity
-                
-                if motion_detected:
-                    motion_detected_in_frame = True
-                    self.active_quadrants.add((row, col))
-                    self.apply_quantum_logic(row, col)
-                    self.highlight_quadrant(current_frame, x1, y1, x2, y2)
-        
-        if motion_detected_in_frame:
-            self.motion_frame_count += 1
+                self.highlight_quadrant(current_frame, x1, y1, x1 + quadrant_width, y1 + quadrant_height)
 
     def highlight_quadrant(self, frame, x1, y1, x2, y2):
         """Highlight a quadrant with motion"""
         cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 0, 0), 2)
 
+    def apply_frame(self, cells, timestamp=None):
+        """Advance the quantum state over one frame's active (row, col) cells in one pass.
+        
+        Gives exactly the result of apply_quantum_logic for each cell in
+        order with the time fixed for the frame: self.monotonic() is read
+        once (or `timestamp` is used), and check_quantum_states only runs
+        for cells where it can change something, i.e. a counter is above
+        `corr` or an OR state is still open.
+        """
+        now = self.monotonic() if timestamp is None else timestamp
+        low, high = self.band
+        corr = self.corr
+        for b, bb in cells:
+            if self.Do == 1:
+                self.Do2 = 1
+                if self.qu == 1:
+                    self.qu = 0
+                elif self.qu == 0:
+                    self.qu = 1
+            
+            in_row, in_col = low < b < high, low < bb < high
+            if in_row or in_col:
+                self.or_count += 1
+                if in_row and in_col:
+                    self.and_count += 1
+                    if self.Do == 1:
+                        self.toggle_quantum_state()
+            
+            if self.or_count > corr or self.and_count > corr or self.last_or_state_time is not None:
+                with self.timer('check_quantum_states'):
+                    self.check_quantum_states(now)
+                if not self.running:
+                    return
+
     def apply_quantum_logic(self, b, bb):
         """Apply quantum state logic based on motion detection"""
         if self.Do == 1:
@@ -193,15 +320,17 @@ self.binary
                 self.it += 1
             self.it = 0
             
-        if 4 < b < 11 or 4 < bb < 11:
+        low, high = self.band
+        if low < b < high or low < bb < high:
             self.or_count += 1
             
-        if 4 < b < 11 and 4 < bb < 11:
+        if low < b < high and low < bb < high:
             self.and_count += 1
             if self.Do == 1:
                 self.toggle_quantum_state()
                 
-        self.check_quantum_states()
+        with self.timer('check_quantum_states'):
+            self.check_quantum_states()
 
     def toggle_quantum_state(self):
         """Toggle quantum state based on current conditions"""
@@ -213,22 +342,22 @@ self.binary
             self.it += 1
         self.it = 0
 
-    def check_quantum_states(self):
-        """Check and process quantum states"""
-        check = self.numa.split(",")
-        current_time = datetime.now()
+    def check_quantum_states(self, now=None):
+        """Check and process quantum states; `now` is a self.monotonic() reading"""
+        check = self.numa
+        now = self.monotonic() if now is None else now
         
         # Process OR states
         if self.or_count > self.corr and self.cyc < len(check):
             if self.last_or_state_time is None:
-                self.last_or_state_time = current_time
-                self.ghost_messages.append(f"OR state initiated at {current_time.strftime('%H:%M:%S')}")
+                self.last_or_state_time = now
+                self.ghost_messages.append(f"OR state initiated at {self.clock().strftime('%H:%M:%S')}")
             
-            or_duration = (current_time - self.last_or_state_time).total_seconds()
+            or_duration = now - self.last_or_state_time
             
-            if check[self.cyc] == str(self.qu):
+            if check[self.cyc] == self.qu:
                 if self.swi == self.longcyc:
-                    self.qu = np.random.randint(0, 2)
+                    self.qu = int(self.rng.integers(0, 2))
                     self.swi = 0
                 self.swi += 1
                 self.Do = 1
@@ -236,7 +365,7 @@ self.binary
                 self.or_count = 0
                 self.and_count = 0
                 self.cyc += 1
-                self.binary += "1"
+                self.binary.append(1)
 
                 self.prime = min(self.prime + 1, self.prime_threshold)
                 
@@ -247,16 +376,16 @@ self.binary
                 self.process_ghost_protocol()
         else:
             if self.last_or_state_time is not None:
-                or_duration = (current_time - self.last_or_state_time).total_seconds()
+                or_duration = now - self.last_or_state_time
                 if or_duration >= self.or_state_threshold:
                     self.ghost_messages.append(f"OR state ended after {or_duration:.2f}s")
             self.last_or_state_time = None
         
         # Process AND states
         if self.and_count > self.corr and self.cyc < len(check):
-            if check[self.cyc] != str(self.qu):
+            if check[self.cyc] != self.qu:
                 if self.swi == self.longcyc:
-                    self.qu = np.random.randint(0, 2)
+                    self.qu = int(self.rng.integers(0, 2))
                     self.swi = 0
                     self.prime = 0
                 self.swi += 1
@@ -264,7 +393,7 @@ self.binary
                 self.ack += 1
                 self.and_count = 0
                 self.cyc += 1
-                self.binary += "0"
+                self.binary.append(0)
                 if self.prime >= self.prime_threshold:
                     self.prime = 0
                 else:
@@ -278,17 +407,20 @@ self.binary
             if self.GhostIterate == 0:
                 self.ghostprotocollast = current_value
                 self.GhostIterate += 1
-                current_time = datetime.now()
+                current_time = self.clock()
                 message = f"Ghost Protocol Initiated: {self.ghostprotocol} (Value: {current_value}), Time: {current_time.strftime('%H:%M:%S')}"
                 self.ghost_messages.append(message)
                 self.last_ghost_check = current_value
                 
                 # Log initialization
-                with open("ack_stats.log", "a") as f:
-                    f.write(f"{current_time.strftime('%Y-%m-%d %H:%M:%S')}, GHOST PROTOCOL INITIALIZED, Value: {current_value}\n")
+                self.log.write({
+                    'event': 'ghost_protocol_initialized',
+                    'time': current_time.isoformat(timespec='seconds'),
+                    'value': current_value,
+                })
             
             if current_value != self.ghostprotocollast:
-                msg = f"Protocol state: {self.binary}"
+                msg = f"Protocol state: {self.binary.recent(64)}"
                 self.ghost_messages.append(msg)
                 self.ghostprotocollast = current_value
         self.ghostprotocol += 1
@@ -298,29 +430,42 @@ def send_message(self):
         """Send a quantum message when conditions are met, could be a message or math."""
         new_message = input("Input:")
         if old_message == new_message:
-            self.numa += ",".join('9' for _ in range(500)) #Paradox search
+            self.numa.append_sentinels(500) #Paradox search
             
 
 if __name__ == "__main__":
+    from runtime import run
+    from metrics import MetricsServer
+    from checkpoint import Checkpointer
+    
+    # Create logs directory if it doesn't exist
+    if not os.path.exists('logs'):
+        os.makedirs('logs')
+    
+    # Initialize the communicator
+    communicator = QuantumCommunicator(sensitivity=500)
+    communicator.checkpointer = Checkpointer(communicator)
     try:
-        # Create logs directory if it doesn't exist
-        if not os.path.exists('logs'):
-            os.makedirs('logs')
-            
-        # Initialize the communicator
-        communicator = QuantumCommunicator(sensitivity=500)
-        print("Quantum Communicator initialized. Starting camera feed...")
-        
-        # Start processing
-        communicator.process_camera()
-        
-    except KeyboardInterrupt:
-        print("\nShutting down gracefully...")
-    except Exception as e:
-        print(f"An error occurred: {str(e)}")
-    finally:
-        # Clean up
-        if hasattr(communicator, 'capture'):
-            communicator.capture.release()
-        cv2.destroyAllWindows()
-        print("Shutdown complete.")
\ No newline at end of file
+        if communicator.checkpointer.resume() is not None:
+            print(f"Resumed from {communicator.checkpointer.path} at cycle {communicator.cyc}.")
+    except (ValueError, OSError, KeyError, TypeError) as e:
+        # A damaged or foreign checkpoint must not stop the decoder; apply() leaves no partial state
+        print(f"Checkpoint {communicator.checkpointer.path} ignored ({e}); starting fresh.")
+    with open(os.path.join('logs', 'decoded.bin'), 'ab') as decoded:
+        communicator.binary.sink = decoded.write
+        print(f"Quantum Communicator initialized (seed {communicator.seed}). Starting camera feed...")
+        
+        # Runs until SIGINT/SIGTERM or 'q'; the runner cleans up
+        # Prometheus-style text on http://127.0.0.1:9109/metrics while running; optional
+        metrics = MetricsServer(communicator)
+        try:
+            metrics.start()
+        except OSError as e:
+            print(f"Metrics disabled, port {metrics.port} unavailable: {e}")
+        try:
+            run(communicator)
+        except Exception as e:
+            print(f"An error occurred: {str(e)}")
+        metrics.stop()
+    
+    print("Shutdown complete.")
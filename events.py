@@ -0,0 +1,137 @@
+import time
+import struct
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+
+MAGIC = b"QBXEVT1\0"
+HEADER = struct.Struct("<8sHHI")  # magic, rows, cols, record size
+
+
+def record_dtype(rows, cols, counts=False):
+    """Fixed-width record: frame index, monotonic timestamp and packed active-cell mask.
+
+    With `counts` each record also carries the per-cell moving-pixel
+    counts, in full-resolution pixels, so the mask can be re-derived for
+    other sensitivities.
+    """
+    fields = [
+        ('frame', '<u8'),
+        ('timestamp', '<f8'),
+        ('mask', 'u1', ((rows * cols + 7) // 8,)),
+    ]
+    if counts:
+        fields.append(('counts', '<u4', (rows * cols,)))
+    return np.dtype(fields)
+
+
+class EventRecorder:
+    """Append one fixed-width record per processed frame to a binary event file"""
+
+    def __init__(self, path, rows=8, cols=16, counts=False):
+        self.path = path
+        self.rows = rows
+        self.cols = cols
+        self.counts = counts
+        self.dtype = record_dtype(rows, cols, counts)
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, rows, cols, self.dtype.itemsize))
+        self.record_struct = struct.Struct(f"<Qd{self.dtype['mask'].shape[0]}s")
+        self.count = 0
+
+    def record(self, frame_index, timestamp, mask, counts=None):
+        if mask.shape != (self.rows, self.cols):
+            raise ValueError(f"Mask shape {mask.shape} does not match {self.rows}x{self.cols} event file")
+        self.file.write(self.record_struct.pack(frame_index, timestamp, np.packbits(mask).tobytes()))
+        if self.counts:
+            self.file.write(np.ascontiguousarray(counts, dtype='<u4').tobytes())
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+
+class EventReplay:
+    """Memory-mapped reader that drives a communicator's decoder from recorded masks"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, self.rows, self.cols, size = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"Not a quadrant event file: {path}")
+        self.has_counts = size == record_dtype(self.rows, self.cols, True).itemsize
+        self.dtype = record_dtype(self.rows, self.cols, self.has_counts)
+        if size != self.dtype.itemsize:
+            raise ValueError(f"Record size {size} does not match a {self.rows}x{self.cols} grid")
+        self.records = np.memmap(path, dtype=self.dtype, mode='r', offset=HEADER.size)
+        self.now = None
+        self.timestamp = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def masks(self, start=0, stop=None, sensitivity=None, chunk=1 << 20):
+        """Yield (frame, timestamp, mask) for records with at least one active cell.
+
+        With `sensitivity` the masks are re-derived from recorded counts.
+        """
+        if sensitivity is not None and not self.has_counts:
+            raise ValueError(f"{self.path} has no per-cell counts to re-threshold")
+        stop = len(self.records) if stop is None else stop
+        cells = self.rows * self.cols
+        for offset in range(start, stop, chunk):
+            block = self.records[offset:min(offset + chunk, stop)]
+            # Quiet frames are skipped in one vectorized pass
+            if sensitivity is None:
+                active = block['mask'].any(axis=1)
+            else:
+                above = block['counts'] > sensitivity
+                active = above.any(axis=1)
+            for index in np.flatnonzero(active):
+                record = block[index]
+                if sensitivity is None:
+                    mask = np.unpackbits(record['mask'])[:cells].astype(bool)
+                else:
+                    mask = above[index]
+                yield int(record['frame']), float(record['timestamp']), mask.reshape(self.rows, self.cols)
+
+    def run(self, communicator, start=0, stop=None, sensitivity=None):
+        """Apply every recorded active-cell mask to the communicator; returns frames replayed"""
+        if len(self.records) == 0:
+            return 0
+        stop = len(self.records) if stop is None else stop
+        base = datetime.now()
+        first = float(self.records[start]['timestamp'])
+        communicator.clock = lambda: self.now
+        communicator.monotonic = lambda: self.timestamp
+        communicator.grid_rows, communicator.grid_cols = self.rows, self.cols
+        for frame, timestamp, mask in self.masks(start, stop, sensitivity):
+            self.timestamp = timestamp
+            self.now = base + timedelta(seconds=timestamp - first)
+            communicator.apply_motion_mask(mask)
+            # qubox ends the run once the ghost protocol counts down
+            if not communicator.running:
+                break
+        communicator.total_frames += stop - start
+        return stop - start
+
+
+if __name__ == "__main__":
+    from replay import load_decoder
+
+    parser = argparse.ArgumentParser(description="Replay a recorded quadrant event file through the decoder")
+    parser.add_argument("path")
+    parser.add_argument("--decoder", choices=("qubox", "comms"), default="qubox")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    replay = EventReplay(args.path)
+    communicator = load_decoder(args.decoder)(headless=True, seed=args.seed)
+    began = time.perf_counter()
+    frames = replay.run(communicator)
+    elapsed = time.perf_counter() - began
+    print(f"frames: {frames}, motion_frames: {communicator.motion_frame_count}, "
+          f"ack: {communicator.ack}, nul: {communicator.nul}, cyc: {communicator.cyc}, "
+          f"elapsed: {elapsed:.3f}, fps: {frames / elapsed if elapsed > 0 else 0:.0f}")
@@ -0,0 +1,284 @@
+import time
+import argparse
+import itertools
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from grid import scan_grid
+
+POLL = 0.0002  # Seconds between checks while waiting on another process
+
+
+class FrameBus:
+    """Preallocated frame slots in shared memory with sequence-numbered handoff.
+
+    Frame `seq` lives in slot ``seq % slots``.  A producer claims the slot
+    once the frame `slots` positions earlier was released, fills the
+    array in place and publishes `seq`; a consumer waits for `seq` to be
+    published, reads the array in place and releases it.  Any number of
+    processes may attach with ``FrameBus(**bus.spec())``; nothing is
+    pickled per frame.  The header holds one int64 per slot for the
+    published and released sequence numbers plus the end-of-stream count
+    and a stop flag, each written by one side only.
+    """
+
+    def __init__(self, shape, dtype=np.uint8, slots=8, name=None):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.slots = slots
+        frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        header_bytes = (2 * slots + 2) * 8
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=header_bytes + slots * frame_bytes)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.header = np.ndarray(2 * slots + 2, dtype=np.int64, buffer=self.shm.buf)
+        self.published = self.header[:slots]
+        self.released = self.header[slots:2 * slots]
+        self.frames = np.ndarray((slots,) + self.shape, dtype=self.dtype, buffer=self.shm.buf, offset=header_bytes)
+        if self.owner:
+            self.published[:] = -1
+            self.released[:] = np.arange(slots) - slots
+            self.header[2 * slots] = np.iinfo(np.int64).max  # End of stream
+            self.header[2 * slots + 1] = 0  # Stop flag
+
+    def spec(self):
+        """Keyword arguments for attaching to this bus from another process"""
+        return {'shape': self.shape, 'dtype': self.dtype.str, 'slots': self.slots, 'name': self.shm.name}
+
+    @property
+    def end(self):
+        return int(self.header[2 * self.slots])
+
+    @property
+    def stopped(self):
+        return bool(self.header[2 * self.slots + 1])
+
+    def finish(self, count):
+        """Mark the stream as ending after `count` frames"""
+        self.header[2 * self.slots] = count
+
+    def stop(self):
+        """Wake every waiter on this bus; they return None from now on"""
+        self.header[2 * self.slots + 1] = 1
+
+    def claim(self, seq):
+        """Wait until `seq`'s slot is free and return it for writing, or None once stopped"""
+        slot = seq % self.slots
+        while self.released[slot] < seq - self.slots:
+            if self.stopped:
+                return None
+            time.sleep(POLL)
+        return None if self.stopped else self.frames[slot]
+
+    def publish(self, seq):
+        self.published[seq % self.slots] = seq
+
+    def wait(self, seq, alive=None):
+        """Wait for `seq` and return its array in place.
+
+        Returns None at the end of the stream, once stopped, or once the
+        optional `alive()` callback reports that a producer has died.
+        """
+        slot = seq % self.slots
+        while self.published[slot] != seq:
+            if self.stopped or seq >= self.end or (alive is not None and not alive()):
+                return None
+            time.sleep(POLL)
+        return self.frames[slot]
+
+    def release(self, seq):
+        self.released[seq % self.slots] = seq
+
+    def close(self):
+        del self.header, self.published, self.released, self.frames
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _blur_worker(frames_spec, gray_spec, index, workers):
+    """Grayscale and blur every `workers`-th frame starting at `index`, bus to bus"""
+    frames, gray = FrameBus(**frames_spec), FrameBus(**gray_spec)
+    buffer = np.empty(gray.shape, dtype=gray.dtype)
+    try:
+        for seq in itertools.count(index, workers):
+            frame = frames.wait(seq)
+            if frame is None:
+                break
+            out = gray.claim(seq)
+            if out is None:
+                break
+            source = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=buffer) if frame.ndim == 3 else frame
+            cv2.GaussianBlur(source, (21, 21), 0, dst=out)
+            frames.release(seq)
+            gray.publish(seq)
+    finally:
+        frames.close()
+        gray.close()
+
+
+def _scan_worker(gray_spec, counts_spec, rows, cols):
+    """Diff consecutive blurred frames in sequence order and publish their per-cell counts"""
+    gray, counts = FrameBus(**gray_spec), FrameBus(**counts_spec)
+    delta = np.empty(gray.shape, dtype=gray.dtype)
+    previous = None
+    try:
+        for seq in itertools.count():
+            current = gray.wait(seq)
+            if current is None:
+                break
+            out = counts.claim(seq)
+            if out is None:
+                break
+            if previous is None:
+                out[...] = 0
+            else:
+                cv2.absdiff(previous, current, dst=delta)
+                cv2.threshold(delta, 25, 255, cv2.THRESH_BINARY, dst=delta)
+                out[...], _ = scan_grid(delta, rows, cols)
+                gray.release(seq - 1)
+            counts.publish(seq)
+            previous = current
+    finally:
+        gray.close()
+        counts.close()
+
+
+class SharedMemoryPipeline:
+    """Capture, grayscale+blur, diff+grid scan and decode as separate processes on FrameBus.
+
+    Capture runs on a thread of the calling process and reads straight
+    into shared frame slots.  `workers` blur processes take alternating
+    frames; one scan process diffs the blurred frames in sequence order;
+    the calling process decodes the counts in that same order, so
+    check_quantum_states sees exactly the frame order of process_camera.
+    The run is headless and has no motion gate or reduced pipeline.
+    If the capture source raises or a worker process dies, every bus is
+    stopped and run() raises instead of waiting for frames that never come.
+    """
+
+    def __init__(self, communicator, capture, workers=2, slots=8):
+        self.communicator = communicator
+        self.capture = capture
+        self.workers = workers
+        self.slots = max(slots, workers + 2)
+        self.buses = []
+        self.processes = []
+        self.captured = 0
+        self.error = None  # Exception raised by the capture source
+
+    def _capture(self, frames, first):
+        seq = 0
+        try:
+            frames.claim(0)[...] = first
+            frames.publish(0)
+            seq = 1
+            while True:
+                slot = frames.claim(seq)
+                if slot is None:
+                    break
+                ret, image = self.capture.read(slot)
+                if not ret:
+                    break
+                if image is not slot:
+                    slot[...] = image
+                frames.publish(seq)
+                seq += 1
+        except Exception as e:
+            self.error = e
+        finally:
+            # Always end the stream, or the stages downstream wait forever
+            self.captured = seq
+            for bus in self.buses:
+                bus.finish(seq)
+
+    def alive(self):
+        """False once the capture source has raised or a worker process has died"""
+        return self.error is None and all(process.exitcode in (None, 0) for process in self.processes)
+
+    def run(self):
+        """Process the source to its end or until the decoder stops; returns frames decoded"""
+        ret, first = self.capture.read()
+        if not ret:
+            return 0
+        communicator = self.communicator
+        rows, cols = communicator.grid_rows, communicator.grid_cols
+        frames = FrameBus(first.shape, first.dtype, self.slots)
+        gray = FrameBus(first.shape[:2], np.uint8, self.slots)
+        counts = FrameBus((rows, cols), np.intp, self.slots)
+        self.buses = [frames, gray, counts]
+
+        self.processes = [
+            multiprocessing.Process(target=_blur_worker, args=(frames.spec(), gray.spec(), index, self.workers),
+                                    name=f"blur{index}", daemon=True)
+            for index in range(self.workers)
+        ]
+        self.processes.append(multiprocessing.Process(target=_scan_worker, args=(gray.spec(), counts.spec(), rows, cols),
+                                                      name="scan", daemon=True))
+        for process in self.processes:
+            process.start()
+        capture = threading.Thread(target=self._capture, args=(frames, first), name="capture", daemon=True)
+        capture.start()
+
+        decoded = 0
+        try:
+            for seq in itertools.count():
+                cell_counts = counts.wait(seq, self.alive)
+                if cell_counts is None:
+                    break
+                communicator.total_frames += 1
+                if seq:
+                    mask = cell_counts > communicator.sensitivity
+                    if communicator.recorder is not None:
+                        communicator.recorder.record(communicator.total_frames, time.monotonic(), mask, cell_counts)
+                    communicator.decode_motion(mask)
+                counts.release(seq)
+                communicator.display_status()
+                decoded += 1
+                if not communicator.running:
+                    break
+            if self.error is not None:
+                raise self.error
+            for process in self.processes:
+                if process.exitcode not in (None, 0):
+                    raise RuntimeError(f"{process.name} worker exited with code {process.exitcode}")
+        finally:
+            for bus in self.buses:
+                bus.stop()
+            capture.join()
+            for process in self.processes:
+                process.join()
+            for bus in self.buses:
+                bus.close()
+        return decoded
+
+
+if __name__ == "__main__":
+    from replay import open_source, load_decoder
+
+    parser = argparse.ArgumentParser(description="Decode a recorded source with multi-process pipeline stages")
+    parser.add_argument("source", help="video file, image directory or .npy stack")
+    parser.add_argument("--workers", type=int, default=2, help="blur processes")
+    parser.add_argument("--decoder", choices=("qubox", "comms"), default="qubox")
+    parser.add_argument("--sensitivity", type=int)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    kwargs = {} if args.sensitivity is None else {'sensitivity': args.sensitivity}
+    communicator = load_decoder(args.decoder)(headless=True, seed=args.seed, **kwargs)
+    source = open_source(args.source)
+    began = time.perf_counter()
+    frames = SharedMemoryPipeline(communicator, source, args.workers).run()
+    elapsed = time.perf_counter() - began
+    source.release()
+    communicator.log.close()
+    communicator.status.stop()
+    print(f"frames: {frames}, motion_frames: {communicator.motion_frame_count}, "
+          f"ack: {communicator.ack}, nul: {communicator.nul}, cyc: {communicator.cyc}, "
+          f"elapsed: {elapsed:.3f}, fps: {frames / elapsed if elapsed > 0 else 0:.0f}")
@@ -0,0 +1,127 @@
+import os
+import argparse
+import cv2
+
+from grid import cell_bounds, active_cells
+from capture import FrameRing, threaded_frames, direct_frames
+from timing import StageTimer
+from motion import MotionDetector
+from status import StatusRenderer
+from replay import open_source, load_decoder
+
+
+class MotionFrontEnd:
+    """Shared capture -> grayscale -> blur -> diff -> grid front end.
+
+    The per-cell moving-pixel counts are computed once per frame and
+    handed to every decoder's ``process_counts(counts)``; each decoder
+    applies its own sensitivity and decision policy.  Only the first
+    decoder draws the terminal status; the others keep logging and
+    render into one devnull handle that run() closes.
+    """
+
+    def __init__(self, decoders=(), capture=None, rows=8, cols=16, headless=False):
+        self.decoders = []
+        self.capture = capture  # Opened on cv2.VideoCapture(0) when None
+        self.rows = rows
+        self.cols = cols
+        self.headless = headless
+        self.total_frames = 0
+        self.threaded_capture = True
+        self.ring = FrameRing(size=4, policy="drop-oldest")
+        self.timer = StageTimer(enabled=True)
+        self.motion = MotionDetector(self.timer)  # motion.gate = None disables the quiet-frame skip
+        self.devnull = None  # Status sink shared by every decoder after the first
+        for decoder in decoders:
+            self.add(decoder)
+
+    def add(self, decoder):
+        """Attach a decoder policy; it must provide process_counts(counts, frame)"""
+        decoder.grid_rows, decoder.grid_cols = self.rows, self.cols
+        if self.decoders:
+            if self.devnull is None:
+                self.devnull = open(os.devnull, "w")
+            decoder.status = StatusRenderer(self.devnull)
+        self.decoders.append(decoder)
+
+    def process_frame(self, frame):
+        """Compute the frame's per-cell counts once and fan them out to every decoder"""
+        self.total_frames += 1
+        # A frame quiet for the most sensitive decoder is quiet for all of them; with
+        # no decoder attached the sensitivity is 0 and nothing is skipped
+        sensitivity = min((decoder.sensitivity for decoder in self.decoders), default=0)
+        counts, audit = self.motion.counts(frame, sensitivity, self.rows, self.cols)
+        if counts is None:
+            return None
+        if audit:
+            self.motion.gate.record_audit((counts > sensitivity).any())
+        for decoder in self.decoders:
+            decoder.process_counts(counts)
+        return counts
+
+    def highlight(self, frame, counts):
+        """Outline the cells active for the first decoder"""
+        cell_h, cell_w = cell_bounds(frame.shape, self.rows, self.cols)
+        for row, col in active_cells(counts > self.decoders[0].sensitivity):
+            x1, y1 = col * cell_w, row * cell_h
+            cv2.rectangle(frame, (x1, y1), (x1 + cell_w, y1 + cell_h), (255, 0, 0), 2)
+
+    def run(self):
+        """Process frames until the source ends or 'q' is pressed"""
+        if self.capture is None:
+            self.capture = cv2.VideoCapture(0)
+
+        if self.threaded_capture:
+            frames = threaded_frames(self.capture, self.ring)
+        else:
+            frames = direct_frames(self.capture)
+
+        try:
+            for frame in frames:
+                counts = self.process_frame(frame)
+                # qubox ends the run once the ghost protocol counts down
+                if not all(decoder.running for decoder in self.decoders):
+                    break
+                if self.headless:
+                    continue
+                if counts is not None:
+                    self.highlight(frame, counts)
+                cv2.imshow('Motion Detection', frame)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+        finally:
+            frames.close()
+            self.capture.release()
+            if not self.headless:
+                cv2.destroyAllWindows()
+            if self.devnull is not None:
+                self.devnull.close()
+                self.devnull = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run several decoders on one shared capture")
+    parser.add_argument("--source", help="video file, image directory or .npy stack instead of the camera")
+    parser.add_argument("--decoders", nargs="+", default=["qubox", "comms"], choices=("qubox", "comms"))
+    parser.add_argument("--headless", action="store_true")
+    args = parser.parse_args()
+
+    if not os.path.exists('logs'):
+        os.makedirs('logs')
+
+    decoders = [load_decoder(name)(headless=True) for name in args.decoders]
+
+    capture = open_source(args.source) if args.source else None
+    front_end = MotionFrontEnd(decoders, capture, headless=args.headless)
+    if args.source:
+        front_end.ring.policy = "block"
+    try:
+        front_end.run()
+    except KeyboardInterrupt:
+        print("\nShutting down gracefully...")
+    finally:
+        front_end.timer.dump(os.path.join('logs', 'frontend-timings.json'))
+        for decoder in decoders:
+            decoder.log.close()
+            decoder.status.stop()
+        print("Shutdown complete.")
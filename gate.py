@@ -0,0 +1,73 @@
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Cheap whole-frame change check on a downscaled grayscale frame.
+
+    A frame is quiet when the estimated number of changed full-resolution
+    pixels, summed over the whole frame, stays below ``sensitivity /
+    margin``: no single cell can then exceed `sensitivity`.  The check
+    uses a lower pixel `level` than the full pipeline's 25 for slack.
+    Because area-downscaling can average changes away, every
+    `audit_every`-th quiet frame is still run through the full pipeline
+    and counted as missed if any cell turns out active; `missed` over
+    `audited` is the measured miss rate.
+    """
+
+    def __init__(self, factor=8, level=10, margin=2.0, audit_every=30):
+        self.factor = factor
+        self.level = level
+        self.margin = margin
+        self.audit_every = audit_every
+        self.previous = None
+
+        # Counters
+        self.frames = 0
+        self.quiet_frames = 0
+        self.skipped = 0
+        self.audited = 0
+        self.missed = 0
+
+    def quiet(self, gray, sensitivity):
+        """Return True when the frame clearly has no active cell; updates the reference frame"""
+        height, width = gray.shape[:2]
+        small = cv2.resize(gray, (max(1, width // self.factor), max(1, height // self.factor)),
+                           interpolation=cv2.INTER_AREA)
+        previous, self.previous = self.previous, small
+        self.frames += 1
+        if previous is None or previous.shape != small.shape:
+            return False
+        changed = np.count_nonzero(cv2.absdiff(small, previous) > self.level)
+        if changed * self.factor * self.factor * self.margin >= sensitivity:
+            return False
+        self.quiet_frames += 1
+        return True
+
+    def audit_due(self):
+        """True when the current quiet frame should be verified by the full pipeline"""
+        return bool(self.audit_every) and self.quiet_frames % self.audit_every == 0
+
+    def record_skip(self):
+        self.skipped += 1
+
+    def record_audit(self, active):
+        self.audited += 1
+        if active:
+            self.missed += 1
+
+    def stats(self):
+        """Skip ratio and the audited miss rate, with a 95% upper bound"""
+        miss_rate = self.missed / self.audited if self.audited else 0.0
+        # Rule of three when no miss has been seen yet
+        bound = (3.0 / self.audited if not self.missed else
+                 miss_rate + 1.96 * (miss_rate * (1 - miss_rate) / self.audited) ** 0.5) if self.audited else 1.0
+        return {
+            'frames': self.frames,
+            'skipped': self.skipped,
+            'skip_ratio': round(self.skipped / self.frames, 4) if self.frames else 0.0,
+            'audited': self.audited,
+            'missed': self.missed,
+            'miss_rate': round(miss_rate, 4),
+            'miss_rate_bound': round(min(bound, 1.0), 4),
+        }
@@ -0,0 +1,26 @@
+import numpy as np
+
+
+def cell_bounds(shape, rows, cols):
+    """Return the cell height and width for a frame split into rows x cols"""
+    height, width = shape[:2]
+    return height // rows, width // cols
+
+
+def scan_grid(thresh, rows=8, cols=16, sensitivity=0, level=10):
+    """Count moving pixels per grid cell in one vectorized pass.
+
+    Returns the (rows, cols) count matrix and the boolean mask of cells
+    whose count exceeds `sensitivity`.  Pixels past the last whole cell
+    are ignored, matching the original per-quadrant loop.
+    """
+    cell_h, cell_w = cell_bounds(thresh.shape, rows, cols)
+    cells = thresh[:rows * cell_h, :cols * cell_w].reshape(rows, cell_h, cols, cell_w)
+    counts = np.count_nonzero(cells > level, axis=(1, 3))
+    return counts, counts > sensitivity
+
+
+def active_cells(mask):
+    """Yield (row, col) pairs of active cells in row-major order"""
+    for row, col in np.argwhere(mask):
+        yield int(row), int(col)
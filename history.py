@@ -0,0 +1,87 @@
+import numpy as np
+
+
+class RingBuffer:
+    """Fixed-capacity float ring buffer; the oldest values are overwritten"""
+
+    def __init__(self, capacity):
+        self.data = np.zeros(capacity)
+        self.count = 0
+
+    def __len__(self):
+        return min(self.count, len(self.data))
+
+    def append(self, value):
+        self.data[self.count % len(self.data)] = value
+        self.count += 1
+
+    def values(self):
+        """Return the stored values oldest first"""
+        if self.count <= len(self.data):
+            return self.data[:self.count].copy()
+        split = self.count % len(self.data)
+        return np.concatenate((self.data[split:], self.data[:split]))
+
+
+class Rollup:
+    """Min/mean/max of a series aggregated into fixed-width time buckets"""
+
+    def __init__(self, bucket_seconds, capacity):
+        self.bucket_seconds = bucket_seconds
+        self.starts = RingBuffer(capacity)
+        self.mins = RingBuffer(capacity)
+        self.means = RingBuffer(capacity)
+        self.maxs = RingBuffer(capacity)
+        self.bucket = None  # Start of the bucket being accumulated
+        self.low = self.high = self.total = 0.0
+        self.samples = 0
+
+    def append(self, timestamp, value):
+        bucket = timestamp - timestamp % self.bucket_seconds
+        if bucket != self.bucket:
+            self.flush()
+            self.bucket = bucket
+            self.low = self.high = value
+            self.total = 0.0
+            self.samples = 0
+        self.low = min(self.low, value)
+        self.high = max(self.high, value)
+        self.total += value
+        self.samples += 1
+
+    def flush(self):
+        """Close the current bucket into the rings"""
+        if self.bucket is None or not self.samples:
+            return
+        self.starts.append(self.bucket)
+        self.mins.append(self.low)
+        self.means.append(self.total / self.samples)
+        self.maxs.append(self.high)
+        self.samples = 0
+
+    def values(self):
+        """Return (starts, mins, means, maxs), including the open bucket"""
+        starts, mins, means, maxs = (ring.values() for ring in (self.starts, self.mins, self.means, self.maxs))
+        if self.samples:
+            starts = np.append(starts, self.bucket)
+            mins = np.append(mins, self.low)
+            means = np.append(means, self.total / self.samples)
+            maxs = np.append(maxs, self.high)
+        return starts, mins, means, maxs
+
+
+class SeriesHistory:
+    """Recent high-resolution window plus per-minute and per-hour rollups of one series"""
+
+    def __init__(self, recent=7200, minutes=7 * 24 * 60, hours=365 * 24):
+        self.recent = RingBuffer(recent)
+        self.minute = Rollup(60, minutes)
+        self.hour = Rollup(3600, hours)
+
+    def __len__(self):
+        return self.recent.count
+
+    def append(self, timestamp, value):
+        self.recent.append(value)
+        self.minute.append(timestamp, value)
+        self.hour.append(timestamp, value)
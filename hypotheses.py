@@ -0,0 +1,226 @@
+import sys
+import csv
+import random
+import argparse
+import itertools
+
+import numpy as np
+
+from grid import active_cells
+from sequence import SENTINEL, generate_numa
+
+
+class HypothesisBank:
+    """The qubox decision state machine for K hypotheses held as NumPy arrays.
+
+    Each hypothesis has its own numa seed, PIN and Do/qu start state and
+    follows the same semantics as ``qubox.QuantumCommunicator`` for
+    apply_quantum_logic, check_quantum_states and process_ghost_protocol
+    (message text and OR/AND durations aside, which never change state).
+    All K hypotheses advance together in one vectorized step per active
+    cell.  The qu resets draw from ``default_rng(seed)`` exactly as a
+    single communicator created with that seed does, so each row
+    reproduces a standalone run.  A hypothesis stops advancing where
+    qubox would have cleared `running`.
+    """
+
+    def __init__(self, seeds, pins=None, do=1, qu=0, length=100000, numa_cache=None,
+                 corr=3, longcyc=3, prime_threshold=3, ghostprotocol=3000, range=10,
+                 band=(4, 11), send_messages=False):
+        from qubox import PIN
+        self.seeds = np.asarray(seeds, dtype=np.int64)
+        k = len(self.seeds)
+        if pins is None:
+            pins = [random.Random(int(seed)).randint(5000, PIN) for seed in self.seeds]
+        self.pins = np.broadcast_to(np.asarray(pins, dtype=np.int64), (k,)).copy()
+        self.corr = corr
+        self.longcyc = longcyc
+        self.prime_threshold = prime_threshold
+        self.range = range
+        self.band = band
+        self.send_messages = send_messages
+
+        self.numa = np.stack([np.asarray(generate_numa(length, int(seed), numa_cache)) for seed in self.seeds])
+        self.length = np.full(k, length, dtype=np.int64)
+        self.rows = np.arange(k)
+
+        # Per-hypothesis qu reset streams, drawn ahead in blocks
+        self.generators = [np.random.default_rng(int(seed)) for seed in self.seeds]
+        self.draws = np.empty((k, 0), dtype=np.int64)
+        self.draw_index = np.zeros(k, dtype=np.int64)
+
+        # Quantum state
+        self.Do = np.broadcast_to(np.asarray(do, dtype=np.int64), (k,)).copy()
+        self.Do2 = np.zeros(k, dtype=np.int64)
+        self.qu = np.broadcast_to(np.asarray(qu, dtype=np.int64), (k,)).copy()
+        self.start_do = self.Do.copy()
+        self.start_qu = self.qu.copy()
+        self.and_count = np.zeros(k, dtype=np.int64)
+        self.or_count = np.zeros(k, dtype=np.int64)
+        self.cyc = np.zeros(k, dtype=np.int64)
+        self.swi = np.zeros(k, dtype=np.int64)
+        self.prime = np.zeros(k, dtype=np.int64)
+        self.ack = np.zeros(k, dtype=np.int64)
+        self.nul = np.zeros(k, dtype=np.int64)
+
+        # Ghost protocol
+        self.ghostprotocol = np.full(k, ghostprotocol, dtype=np.int64)
+        self.ghostprotocollast = np.zeros(k, dtype=np.int64)
+        self.GhostIterate = np.zeros(k, dtype=np.int64)
+        self.alive = np.ones(k, dtype=bool)
+        self.ghost_frame = np.full(k, -1, dtype=np.int64)
+        self.exit_frame = np.full(k, -1, dtype=np.int64)
+        self.ready_frame = np.full(k, -1, dtype=np.int64)
+        self.frame = 0
+
+    def __len__(self):
+        return len(self.seeds)
+
+    def _draw(self, mask):
+        """Next qu reset value for each hypothesis in mask"""
+        ks = np.flatnonzero(mask)
+        if self.draw_index[ks].max() >= self.draws.shape[1]:
+            block = max(64, self.draws.shape[1])
+            extra = np.stack([generator.integers(0, 2, block) for generator in self.generators])
+            self.draws = np.concatenate((self.draws, extra), axis=1)
+        values = self.draws[ks, self.draw_index[ks]]
+        self.draw_index[ks] += 1
+        return values
+
+    def _reference(self):
+        """numa[cyc] per hypothesis; appended sentinels read as SENTINEL"""
+        base = self.numa.shape[1]
+        values = self.numa[self.rows, np.minimum(self.cyc, base - 1)].astype(np.int64)
+        return np.where(self.cyc < base, values, SENTINEL)
+
+    def _ghost_protocol(self, hit):
+        current_value = self.ghostprotocol * self.range
+        active = hit & (self.prime < 1) & (self.ghostprotocol > 3)
+        initiated = active & (self.GhostIterate == 0)
+        self.ghostprotocollast[initiated] = current_value[initiated]
+        self.GhostIterate[initiated] += 1
+        self.ghost_frame[initiated] = self.frame
+        changed = active & (current_value != self.ghostprotocollast)
+        self.ghostprotocollast[changed] = current_value[changed]
+        self.ghostprotocol[hit] -= 1
+        exited = hit & (self.ghostprotocol <= 0)
+        self.alive[exited] = False
+        self.exit_frame[exited] = self.frame
+
+    def step_cell(self, b, bb):
+        """apply_quantum_logic + check_quantum_states for one active cell, for every hypothesis"""
+        live = self.alive
+        flip = live & (self.Do == 1)
+        self.Do2[flip] = 1
+        self.qu ^= flip
+
+        low, high = self.band
+        in_row, in_col = low < b < high, low < bb < high
+        if in_row or in_col:
+            self.or_count += live
+        if in_row and in_col:
+            self.and_count += live
+            self.qu ^= flip
+
+        # OR states
+        hit = live & (self.or_count > self.corr) & (self.cyc < self.length) & (self._reference() != self.qu)
+        if hit.any():
+            reset = hit & (self.swi == self.longcyc)
+            if reset.any():
+                self.qu[reset] = self._draw(reset)
+                self.swi[reset] = 0
+            self.swi[hit] += 1
+            self.Do[hit] = 1
+            self.nul[hit] += 1
+            self.or_count[hit] = 0
+            self.and_count[hit] = 0
+            self.cyc[hit] += 1
+            self.prime[hit] = np.minimum(self.prime[hit] + 1, self.prime_threshold)
+            self._ghost_protocol(hit)
+
+        # AND states
+        live = self.alive
+        hit = live & (self.and_count > self.corr) & (self.cyc < self.length) & (self._reference() == self.qu)
+        if hit.any():
+            reset = hit & (self.swi == self.longcyc)
+            if reset.any():
+                self.qu[reset] = self._draw(reset)
+                self.swi[reset] = 0
+                self.prime[reset] = 0
+            self.swi[hit] += 1
+            self.Do[hit] = 1
+            self.ack[hit] += 1
+            self.and_count[hit] = 0
+            self.cyc[hit] += 1
+            self.prime[hit] = np.where(self.prime[hit] >= self.prime_threshold, 0, self.prime[hit] + 1)
+
+    def step_mask(self, mask, frame=None):
+        """Advance every hypothesis over one frame's active-cell mask"""
+        if frame is not None:
+            self.frame = frame
+        for row, col in active_cells(mask):
+            self.step_cell(row, col)
+        # send_message's condition, evaluated per hypothesis
+        ready = self.alive & (self.pins <= self.ghostprotocol * self.range)
+        self.ready_frame[ready & (self.ready_frame < 0)] = self.frame
+        if self.send_messages:
+            self.length[ready] += 500
+
+    def run(self, replay, sensitivity=None):
+        """Advance the bank over a recorded events.EventReplay session"""
+        for frame, timestamp, mask in replay.masks(sensitivity=sensitivity):
+            if not self.alive.any():
+                break
+            self.step_mask(mask, frame)
+
+    def results(self):
+        """One result row per hypothesis"""
+        decided = self.ack + self.nul
+        return [
+            {
+                'seed': int(self.seeds[k]),
+                'pin': int(self.pins[k]),
+                'do': int(self.start_do[k]),
+                'qu': int(self.start_qu[k]),
+                'ack': int(self.ack[k]),
+                'nul': int(self.nul[k]),
+                'ack_rate': round(float(self.ack[k] / decided[k]), 4) if decided[k] else 0.0,
+                'cyc': int(self.cyc[k]),
+                'ghost_protocol': int(self.ghostprotocol[k]),
+                'ghost_frame': int(self.ghost_frame[k]),
+                'ready_frame': int(self.ready_frame[k]),
+                'exit_frame': int(self.exit_frame[k]),
+            }
+            for k in range(len(self))
+        ]
+
+
+def parse_values(text):
+    """Parse "a:b[:step]" ranges or comma-separated integers"""
+    if ":" in text:
+        return list(range(*(int(part) for part in text.split(":"))))
+    return [int(part) for part in text.split(",")]
+
+
+if __name__ == "__main__":
+    from events import EventReplay
+
+    parser = argparse.ArgumentParser(description="Evaluate many PIN/seed/start-state hypotheses on one recorded session")
+    parser.add_argument("path", help="event file written by replay.py --record")
+    parser.add_argument("--seeds", type=parse_values, default=[0], help='e.g. "0:1000" or "3,7,11"')
+    parser.add_argument("--pins", type=parse_values, help="PINs to test; defaults to each seed's own PIN")
+    parser.add_argument("--do", type=parse_values, default=[1])
+    parser.add_argument("--qu", type=parse_values, default=[0])
+    parser.add_argument("--length", type=int, default=100000)
+    parser.add_argument("--sensitivity", type=int)
+    args = parser.parse_args()
+
+    combos = list(itertools.product(args.seeds, args.pins or [None], args.do, args.qu))
+    seeds, pins, dos, qus = zip(*combos)
+    bank = HypothesisBank(seeds, None if args.pins is None else pins, dos, qus, args.length)
+    bank.run(EventReplay(args.path), args.sensitivity)
+
+    rows = bank.results()
+    writer = csv.DictWriter(sys.stdout, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
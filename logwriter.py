@@ -0,0 +1,111 @@
+import os
+import json
+import time
+import queue
+import atexit
+import threading
+
+_STOP = object()
+
+
+class LogWriter:
+    """Background JSON Lines writer that batches records and rotates by size or age.
+
+    `write` only enqueues the record; a daemon thread formats and
+    appends batches every `flush_interval` seconds or `batch_size`
+    records.  The file is rotated to ``path.1`` .. ``path.N`` once it
+    exceeds `max_bytes` or has been open for `max_age` seconds.  A
+    `path` of None discards records, e.g. for parameter sweeps.
+    """
+
+    def __init__(self, path, max_bytes=16 * 2 ** 20, max_age=None, backup_count=5,
+                 flush_interval=1.0, batch_size=256):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.queue = queue.SimpleQueue()
+        self.thread = None
+        self.file = None
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+
+        # Counters
+        self.records = 0
+        self.batches = 0
+        self.rotations = 0
+
+    def write(self, record):
+        """Queue one record (a JSON-serializable dict) for the writer thread"""
+        if self.path is None:
+            return
+        if self.thread is None:
+            self._start()
+        self.queue.put(record)
+
+    def _start(self):
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self._run, name="LogWriter", daemon=True)
+            self.thread.start()
+            atexit.register(self.close)
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(self.path, "a", encoding="utf-8")
+        self.opened_at = time.monotonic()
+
+    def _should_rotate(self):
+        if self.max_bytes and self.file.tell() >= self.max_bytes:
+            return True
+        return bool(self.max_age) and time.monotonic() - self.opened_at >= self.max_age
+
+    def _rotate(self):
+        self.file.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.rotations += 1
+        self._open()
+
+    def _run(self):
+        self._open()
+        running = True
+        while running:
+            batch = []
+            try:
+                batch.append(self.queue.get(timeout=self.flush_interval))
+                while len(batch) < self.batch_size:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+            if _STOP in batch:
+                batch.remove(_STOP)
+                running = False
+            if not batch:
+                continue
+            self.file.write("".join(json.dumps(record, separators=(",", ":")) + "\n" for record in batch))
+            self.file.flush()
+            self.records += len(batch)
+            self.batches += 1
+            if self._should_rotate():
+                self._rotate()
+        self.file.close()
+
+    def close(self):
+        """Flush queued records and stop the writer thread"""
+        thread = self.thread
+        if thread is None or not thread.is_alive():
+            return
+        self.queue.put(_STOP)
+        thread.join()
@@ -0,0 +1,115 @@
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_PORT = 9108
+METRICS_PORTS = {'qubox': 9108, 'comms': 9109}  # Both decoders can run side by side
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsServer:
+    """Prometheus text exposition of a communicator's counters on 127.0.0.1.
+
+    Nothing is added to the hot loop: each scrape reads the
+    communicator's plain attributes, the last analyze_ack_rate result
+    and the StageTimer windows, and formats them on the server thread.
+    The frame rate is measured between consecutive scrapes.  `port`
+    defaults to the decoder's entry in METRICS_PORTS.
+    """
+
+    def __init__(self, communicator, port=None, host="127.0.0.1"):
+        self.communicator = communicator
+        self.decoder = communicator.name
+        self.host = host
+        self.port = METRICS_PORTS.get(self.decoder, METRICS_PORT) if port is None else port
+        self.server = None
+        self.thread = None
+        self.lock = threading.Lock()
+        self.last_scrape = (time.monotonic(), 0)
+        self.fps = 0.0
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = server.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes must not write over the status view
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, name="MetricsServer", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.server = None
+
+    def frame_rate(self, total_frames):
+        now = time.monotonic()
+        with self.lock:
+            then, frames = self.last_scrape
+            if now - then > 0:
+                self.fps = (total_frames - frames) / (now - then)
+            self.last_scrape = (now, total_frames)
+            return self.fps
+
+    def render(self):
+        """Format the current values; called only when /metrics is requested"""
+        c = self.communicator
+        label = f'decoder="{self.decoder}"'
+        lines = []
+
+        def metric(name, kind, help, value):
+            lines.append(f"# HELP quantum_{name} {help}")
+            lines.append(f"# TYPE quantum_{name} {kind}")
+            lines.append(f"quantum_{name}{{{label}}} {value}")
+
+        metric("ack_total", "counter", "Acknowledgments decided", c.ack)
+        metric("nul_total", "counter", "Nullifications decided", c.nul)
+        metric("cycle_position", "gauge", "Position in the numa sequence", c.cyc)
+        metric("ghost_protocol", "gauge", "Ghost protocol countdown", c.ghostprotocol)
+        metric("frames_total", "counter", "Frames processed", c.total_frames)
+        metric("motion_frames_total", "counter", "Frames with at least one active cell", c.motion_frame_count)
+        metric("frames_per_second", "gauge", "Frame rate since the previous scrape",
+               round(self.frame_rate(c.total_frames), 2))
+        if c.ack_history:
+            stats = c.ack_history[-1]
+            metric("acks_per_refresh", "gauge", "ACK rate per status refresh", stats['acks_per_refresh'])
+            metric("acks_per_second", "gauge", "ACK rate per second", stats['acks_per_second'])
+        if c.threaded_capture:
+            metric("capture_dropped_total", "counter", "Frames dropped by the capture queue", c.capture_stats()['dropped'])
+        if c.motion.gate is not None:
+            metric("gate_skipped_total", "counter", "Quiet frames skipped by the motion gate", c.motion.gate.skipped)
+        metric("running", "gauge", "1 until the decoder ends its run", int(c.running))
+
+        summary = c.timer.summary() if c.timer.enabled else {}
+        if summary:
+            lines.append("# HELP quantum_stage_latency_seconds Recent per-stage latency")
+            lines.append("# TYPE quantum_stage_latency_seconds summary")
+            for stage, s in summary.items():
+                for quantile, key in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99")):
+                    lines.append(f'quantum_stage_latency_seconds{{{label},stage="{stage}",quantile="{quantile}"}} '
+                                 f'{s[key] / 1000:.6f}')
+                lines.append(f'quantum_stage_latency_seconds_count{{{label},stage="{stage}"}} {s["count"]}')
+            lines.append("# HELP quantum_stage_latency_max_seconds Worst per-stage latency of the run")
+            lines.append("# TYPE quantum_stage_latency_max_seconds gauge")
+            for stage, s in summary.items():
+                lines.append(f'quantum_stage_latency_max_seconds{{{label},stage="{stage}"}} {s["max"] / 1000:.6f}')
+        return "\n".join(lines) + "\n"
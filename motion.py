@@ -0,0 +1,76 @@
+import cv2
+import numpy as np
+
+from grid import scan_grid
+from gate import MotionGate
+
+
+class MotionDetector:
+    """Grayscale -> motion gate -> blur -> frame diff -> grid scan, one frame at a time.
+
+    The one copy of the motion front end used by both decoders'
+    ``detect_motion`` and by frontend.MotionFrontEnd.  ``counts()``
+    returns the per-cell moving-pixel counts of a frame against the
+    previous one.  A frame the gate finds quiet gets all-zero counts
+    without being blurred or diffed; it is kept raw and blurred only if
+    the next frame needs it as the reference.  With `reduced` (a
+    reduced.ReducedPipeline) the blur, diff and scan run there instead.
+    """
+
+    def __init__(self, timer, gate=True):
+        self.timer = timer
+        self.gate = MotionGate() if gate else None  # None disables the quiet-frame skip
+        self.reduced = None
+        self.previous = None  # Blurred reference frame
+        self.skipped_gray = None
+
+    def counts(self, frame, sensitivity, rows=8, cols=16):
+        """Return (counts, audit); counts is None for the first frame.
+
+        `sensitivity` is the smallest per-cell count that matters to the
+        caller; the gate only skips frames that cannot reach it.  `audit`
+        is True for a quiet frame the gate still wants checked, and the
+        caller reports the outcome with ``gate.record_audit()``.
+        """
+        with self.timer('grayscale'):
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+
+        audit = False
+        if self.gate is not None:
+            with self.timer('gate'):
+                quiet = self.gate.quiet(gray, sensitivity)
+            reference = self.previous if self.reduced is None else self.reduced.previous
+            if quiet and reference is not None:
+                if not self.gate.audit_due():
+                    self.gate.record_skip()
+                    if self.reduced is not None:
+                        self.reduced.defer(gray)
+                    else:
+                        self.skipped_gray = gray.copy() if gray is frame else gray
+                    return np.zeros((rows, cols), dtype=np.intp), False
+                audit = True
+
+        if self.reduced is not None:
+            with self.timer('reduced'):
+                return self.reduced.counts(gray), audit
+
+        if self.skipped_gray is not None:
+            with self.timer('blur'):
+                self.previous = cv2.GaussianBlur(self.skipped_gray, (21, 21), 0)
+            self.skipped_gray = None
+
+        with self.timer('blur'):
+            gray = cv2.GaussianBlur(gray, (21, 21), 0)
+
+        if self.previous is None:
+            self.previous = gray
+            return None, False
+
+        with self.timer('absdiff+threshold'):
+            frame_delta = cv2.absdiff(self.previous, gray)
+            thresh = cv2.threshold(frame_delta, 25, 255, cv2.THRESH_BINARY)[1]
+        self.previous = gray
+
+        with self.timer('grid_scan'):
+            counts, _ = scan_grid(thresh, rows, cols)
+        return counts, audit
@@ -4,19 +4,29 @@ import os
 from datetime import datetime
 from collections import deque
 import random
+from sequence import generate_numa
+from grid import cell_bounds, active_cells
+from capture import FrameRing, threaded_frames, direct_frames
+from timing import StageTimer
+from motion import MotionDetector
+from logwriter import LogWriter
+from history import SeriesHistory
+from status import StatusRenderer
+from anomaly import AckAnomalyMonitor
 import time
-import matplotlib.pyplot as plt
 PIN = 26000
 
 class QuantumCommunicator:
-    def __init__(self, sensitivity):
+    name = "qubox"  # Decoder name; the module is __main__ when run as a script
+    
+    def __init__(self, sensitivity=1500, capture=None, headless=False, seed=None, numa_cache=None):
         # Camera and processing setup
         self.sensitivity = sensitivity
-        self.data2 = None
-        self.capture = cv2.VideoCapture(0)
+        self.capture = capture  # Opened on cv2.VideoCapture(0) when None
+        self.headless = headless
         
-        self.ack_data = []  # To store ACK/Refresh data
-        self.ack_second_data = []  # To store ACK/Second data
+        self.ack_data = SeriesHistory()  # To store ACK/Refresh data
+        self.ack_second_data = SeriesHistory()  # To store ACK/Second data
         self.i = 0
         # Initialize quantum state variables
         self.Do = 1
@@ -28,10 +38,11 @@ class QuantumCommunicator:
         self.cyc = 0
         self.swi = 0
         self.longcyc = 3
-        # Initialize the seed using the current time
-        seed = int(time.time())
-        random.seed(seed)
-        self.numa = ",".join(str(np.random.randint(0, 2)) for _ in range(100000))
+        # Fresh OS entropy unless a seed is given; logged so the run can be reproduced
+        self.seed = int(np.random.SeedSequence().entropy) if seed is None else seed
+        random.seed(self.seed)
+        self.rng = np.random.default_rng(self.seed)
+        self.numa = generate_numa(100000, self.seed, numa_cache)
         self.corr = 3
         self.prime = 0
         self.ghostprotocol = 3000
@@ -44,7 +55,9 @@ class QuantumCommunicator:
         self.nul = 0
         self.last_ack_count = 0
         self.start_time = datetime.now()
-        self.ack_history = []
+        self.ack_history = deque(maxlen=1024)
+        self.anomalies = AckAnomalyMonitor()  # Flags abnormal ACK rate segments as they happen
+        self.anomaly_events = []
         
         # Status tracking variables
         self.motion_frame_count = 0
@@ -52,6 +65,33 @@ class QuantumCommunicator:
         self.last_status_update = datetime.now()
         self.status_update_interval = 0.5
         self.total_frames = 0
+        self.grid_rows = 8
+        self.grid_cols = 16
+        self.band = (4, 11)  # Exclusive row/col bounds for the OR/AND gates
+        self.clock = datetime.now  # Wall time for message text; replaced by recorded time during event replay
+        self.monotonic = time.monotonic  # Time base of OR/AND durations; likewise replaced during event replay
+        self.recorder = None  # Optional events.EventRecorder of per-frame masks
+        self.running = True  # Cleared when the decoder is done; callers stop feeding frames
+        self.checkpointer = None  # Optional checkpoint.Checkpointer, driven from display_status
+        
+        # Capture stage: producer thread filling a ring of preallocated frames
+        self.threaded_capture = True
+        self.ring = FrameRing(size=4, policy="drop-oldest")
+        self.capture_stats = self.ring.stats  # Read by the status view and metrics; runtime.AsyncRunner swaps in its own
+        
+        # Per-stage hot-path timings
+        self.timer = StageTimer(enabled=True)
+        
+        # Motion front end: motion.gate skips clearly quiet frames (None disables),
+        # motion.reduced takes an optional reduced.ReducedPipeline
+        self.motion = MotionDetector(self.timer)
+        
+        # In-place terminal status, drawn on its own thread
+        self.status = StatusRenderer(threaded=True)
+        
+        # Batched JSON Lines log written on a background thread; one file per decoder
+        self.log = LogWriter(os.path.join('logs', 'qubox.jsonl'))
+        self.seed_logged = False
         
         # Ghost protocol variables
         self.ghost_messages = deque(maxlen=4)
@@ -71,16 +111,31 @@ class QuantumCommunicator:
         self.last_and_state_time = None
     def plot_ack_data(self):
         """Plot the ACK and ACK/Second data."""
+        # Imported here: only needed at shutdown, and slow to import
+        import matplotlib.pyplot as plt
+        
         plt.figure(figsize=(10, 6))
 
-        # Plot ACK data
+        # Plot the recent high-resolution window
         plt.subplot(2, 1, 1)
-        plt.plot(self.ack_data, label="ACK/Refresh Data", color="blue")
+        recent = self.ack_data.recent
+        plt.plot(np.arange(recent.count - len(recent), recent.count), recent.values(), label="ACK/Refresh Data", color="blue")
         plt.title("ACK/Refresh Data Over Time")
         plt.xlabel("Frame Number")
         plt.ylabel("Count")
         plt.legend()
         
+        # Plot the per-minute rollup of the whole run
+        plt.subplot(2, 1, 2)
+        starts, mins, means, maxs = self.ack_data.minute.values()
+        minutes = starts / 60
+        plt.fill_between(minutes, mins, maxs, color="blue", alpha=0.2, label="Min/Max")
+        plt.plot(minutes, means, color="blue", label="Mean")
+        plt.title("ACK/Refresh Per Minute")
+        plt.xlabel("Minute")
+        plt.ylabel("Count")
+        plt.legend()
+        
         plt.tight_layout()
         plt.show()
     def analyze_ack_rate(self):
@@ -103,169 +158,266 @@ class QuantumCommunicator:
         # Update tracking variables
         self.last_ack_count = self.ack
         self.ack_history.append(stats)
+        self.anomaly_events.extend(self.anomalies.update(stats))
+        stats['abnormal'] = self.anomalies.abnormal()
         
         return stats
 
-    def clear_console(self):
-        """Clear the console screen"""
-        os.system('cls' if os.name == 'nt' else 'clear')
-
     def display_status(self):
         """Display current status information with ACK rate analysis"""
         current_time = datetime.now()
         if (current_time - self.last_status_update).total_seconds() < self.status_update_interval:
             return
             
-        self.clear_console()
+        began = self.timer.start()
         ack_stats = self.analyze_ack_rate()
+        lines = []
 
-        print("=" * 50)
-        print("QUANTUM COMMUNICATOR STATUS")
-        print("=" * 50)
-        print(f"Time: {current_time.strftime('%H:%M:%S')}")
-        
-        print(f"\nACK RATE ANALYSIS:")
-        print(f"ACKs per Refresh: {ack_stats['acks_per_refresh']}")
-        print(f"ACKs per Second: {ack_stats['acks_per_second']}")
-        print(f"Total ACKs: {ack_stats['total_acks']}")
-        print(f"Recent ACK Delta: {ack_stats['ack_delta']}")
-        print(f"Elapsed Time: {ack_stats['elapsed_time']}s")
-        
-        print(f"\nQUANTUM STATES:")
-        print(f"Current Quantum State (qu): {self.qu}")
-        print(f"Cycle Position (cyc): {self.cyc}/{len(self.numa.split(','))}")
-        print(f"Switch Counter (swi): {self.swi}/{self.longcyc}")
-        
-        print(f"\nDETECTION COUNTERS:")
-        print(f"AND Gate Detections: {self.and_count}/{self.corr}")
-        print(f"OR Gate Detections: {self.or_count}/{self.corr}")
+        lines.append("=" * 50)
+        lines.append("QUANTUM COMMUNICATOR STATUS")
+        lines.append("=" * 50)
+        lines.append(f"Time: {current_time.strftime('%H:%M:%S')}")
+        
+        lines.append(f"\nACK RATE ANALYSIS:")
+        lines.append(f"ACKs per Refresh: {ack_stats['acks_per_refresh']}")
+        lines.append(f"ACKs per Second: {ack_stats['acks_per_second']}")
+        lines.append(f"Total ACKs: {ack_stats['total_acks']}")
+        lines.append(f"Recent ACK Delta: {ack_stats['ack_delta']}")
+        lines.append(f"Elapsed Time: {ack_stats['elapsed_time']}s")
+        
+        lines.append(f"\nACK RATE ANOMALIES:")
+        for line in self.anomalies.lines():
+            lines.append(line)
+        
+        lines.append(f"\nQUANTUM STATES:")
+        lines.append(f"Current Quantum State (qu): {self.qu}")
+        lines.append(f"Cycle Position (cyc): {self.cyc}/{len(self.numa)}")
+        lines.append(f"Switch Counter (swi): {self.swi}/{self.longcyc}")
+        
+        lines.append(f"\nDETECTION COUNTERS:")
+        lines.append(f"AND Gate Detections: {self.and_count}/{self.corr}")
+        lines.append(f"OR Gate Detections: {self.or_count}/{self.corr}")
         if self.last_or_state_time:
-            or_duration = (current_time - self.last_or_state_time).total_seconds()
-            print(f"Current OR State Duration: {or_duration:.2f}s")
+            or_duration = self.monotonic() - self.last_or_state_time
+            lines.append(f"Current OR State Duration: {or_duration:.2f}s")
         if self.last_and_state_time:
-            and_duration = (current_time - self.last_and_state_time).total_seconds()
-            print(f"Current AND State Duration: {and_duration:.2f}s")
+            and_duration = self.monotonic() - self.last_and_state_time
+            lines.append(f"Current AND State Duration: {and_duration:.2f}s")
         motion_percentage = (self.motion_frame_count / max(1, self.total_frames)) * 100
-        print(f"Motion Detected: {self.motion_frame_count} frames ({motion_percentage:.1f}%)")
+        lines.append(f"Motion Detected: {self.motion_frame_count} frames ({motion_percentage:.1f}%)")
+        
+        if self.threaded_capture:
+            ring_stats = self.capture_stats()
+            lines.append(f"\nCAPTURE QUEUE ({ring_stats['policy']}):")
+            lines.append(f"Frames Captured: {ring_stats['captured']}")
+            lines.append(f"Frames Dropped: {ring_stats['dropped']}")
+            lines.append(f"Queue Depth: {ring_stats['depth']}/{ring_stats['size']} (max {ring_stats['max_depth']})")
+        
+        if self.motion.gate is not None:
+            gate_stats = self.motion.gate.stats()
+            lines.append(f"\nMOTION GATE:")
+            lines.append(f"Skipped Frames: {gate_stats['skipped']} ({gate_stats['skip_ratio'] * 100:.1f}%)")
+            lines.append(f"Audited Quiet Frames: {gate_stats['audited']}, Missed: {gate_stats['missed']} "
+                         f"(miss rate <= {gate_stats['miss_rate_bound'] * 100:.1f}%)")
+        
+        if self.timer.enabled:
+            lines.append(f"\nSTAGE TIMINGS:")
+            for line in self.timer.lines():
+                lines.append(line)
         
-        print(f"\nPROTOCOL STATUS:")
-        print(f"Ghost Protocol Value: {self.ghostprotocol * self.range}")
-        print(f"Ghost Protocol State: {self.ghostprotocol * self.range}")
-        print(f"Prime State: {self.prime}")
-        print(f"Acknowledgments (ACK): {self.ack}")
-        print(f"Nullifications (NUL): {self.nul}")
+        lines.append(f"\nPROTOCOL STATUS:")
+        lines.append(f"Ghost Protocol Value: {self.ghostprotocol * self.range}")
+        lines.append(f"Ghost Protocol State: {self.ghostprotocol * self.range}")
+        lines.append(f"Prime State: {self.prime}")
+        lines.append(f"Acknowledgments (ACK): {self.ack}")
+        lines.append(f"Nullifications (NUL): {self.nul}")
         
-        print(f"\nGHOST PROTOCOL OUTPUT:")
+        lines.append(f"\nGHOST PROTOCOL OUTPUT:")
         if self.ghost_messages:
             for msg in self.ghost_messages:
-                print(msg)
+                lines.append(msg)
         else:
-            print("No ghost protocol messages yet")
+            lines.append("No ghost protocol messages yet")
         
-        print("=" * 50)
+        lines.append("=" * 50)
+        self.status.submit(lines)
+        
+        self.timer.stop('display_status', began)
         
         # Log ACK stats to file
-        self.log_ack_stats(ack_stats)
+        with self.timer('log_ack_stats'):
+            self.log_ack_stats(ack_stats)
         
         self.last_status_update = current_time
         self.active_quadrants.clear()
+        
+        # Periodic checkpoint; the snapshot is written on the checkpointer's thread
+        if self.checkpointer is not None:
+            self.checkpointer.maybe()
 
     def log_ack_stats(self, stats):
         """Log ACK statistics and ghost protocol messages to a file"""
-        current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        log_entry = (
-            f"Frame: {self.i}, "  # Add frame number
-            f"{current_time}, "
-            f"ACKs/Refresh: {stats['acks_per_refresh']}, "
-            f"ACKs/Second: {stats['acks_per_second']}, "
-            f"Total ACKs: {stats['total_acks']}, "
-            f"Delta: {stats['ack_delta']}, "
-            f"Elapsed: {stats['elapsed_time']}s, "
-            f"Ghost Protocol: {self.ghostprotocol}, "
-            f"Ghost Value: {self.ghostprotocol * self.range}, "
-            f"PIN: {self.PIN}"
-        )
+        current_time = datetime.now()
+        if not self.seed_logged:
+            self.log.write({'event': 'run_started', 'time': current_time.isoformat(timespec='seconds'), 'seed': self.seed})
+            self.seed_logged = True
+        log_entry = {
+            'event': 'ack_stats',
+            'frame': self.i,  # Add frame number
+            'time': current_time.isoformat(timespec='seconds'),
+            'acks_per_refresh': stats['acks_per_refresh'],
+            'acks_per_second': stats['acks_per_second'],
+            'total_acks': stats['total_acks'],
+            'delta': stats['ack_delta'],
+            'elapsed': stats['elapsed_time'],
+            'ghost_protocol': self.ghostprotocol,
+            'ghost_value': self.ghostprotocol * self.range,
+            'pin': self.PIN,
+            'abnormal': stats['abnormal'],
+        }
         self.i += 1
-        self.ack_data.append(stats['acks_per_refresh'])
-        self.ack_data.append(stats['acks_per_second'])
+        self.ack_data.append(stats['elapsed_time'], stats['acks_per_refresh'])
+        self.ack_second_data.append(stats['elapsed_time'], stats['acks_per_second'])
         if self.last_or_state_time:
-            or_duration = (datetime.now() - self.last_or_state_time).total_seconds()
-            log_entry += f", OR Duration: {or_duration:.2f}s"
+            log_entry['or_duration'] = round(self.monotonic() - self.last_or_state_time, 2)
         
         if self.last_and_state_time:
-            and_duration = (datetime.now() - self.last_and_state_time).total_seconds()
-            log_entry += f", AND Duration: {and_duration:.2f}s"
-        
-        log_entry += "\n"
+            log_entry['and_duration'] = round(self.monotonic() - self.last_and_state_time, 2)
         
-        with open("ack_stats.log", "a") as f:
-            f.write(log_entry)
+        self.log.write(log_entry)
+        for event in self.anomaly_events:
+            self.log.write(dict(event, time=log_entry['time'], frame=log_entry['frame']))
+        self.anomaly_events.clear()
 
     def process_camera(self):
         """Process camera feed and detect motion in quadrants"""
-        while True:
-            ret, frame = self.capture.read()
-            if not ret:
+        if self.capture is None:
+            self.capture = cv2.VideoCapture(0)
+        
+        if self.threaded_capture:
+            frames = threaded_frames(self.capture, self.ring)
+        else:
+            frames = direct_frames(self.capture)
+        
+        for frame in frames:
+            self.process_frame(frame)
+            if not self.running:
                 break
-            
-            self.total_frames += 1
-            
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            gray = cv2.GaussianBlur(gray, (21, 21), 0)
-            
-            if self.data2 is None:
-                self.data2 = gray
+            if self.headless:
                 continue
             
-            self.process_motion(frame, gray)
-            self.data2 = gray
-            
-            # Display status in command line
-            self.display_status()
-            
             # Display the resulting frame
             cv2.imshow('Motion Detection', frame)
             
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 break
         
+        frames.close()
         self.capture.release()
-        cv2.destroyAllWindows()
+        if not self.headless:
+            cv2.destroyAllWindows()
 
-    def process_motion(self, current_frame, gray_frame):
-        """Process motion detection and quantum logic"""
-        frame_delta = cv2.absdiff(self.data2, gray_frame)
-        thresh = cv2.threshold(frame_delta, 25, 255, cv2.THRESH_BINARY)[1]
+    def process_frame(self, frame):
+        """Run one frame through grayscale, blur, motion detection and status"""
+        mask, audit = self.detect_motion(frame)
+        if mask is not None:
+            self.decode_motion(mask, frame, audit)
         
-        motion_detected_in_frame = False
+        # Display status in command line
+        self.display_status()
+
+    def detect_motion(self, frame):
+        """Run one frame through the motion front end; returns (mask, audit).
+        
+        The mask is None for the first frame and all False for frames the
+        gate skips.  Only the motion pipeline state is touched, so
+        runtime.AsyncRunner calls this on a worker thread while the
+        previous mask is decoded.
+        """
+        self.total_frames += 1
+        counts, audit = self.motion.counts(frame, self.sensitivity, self.grid_rows, self.grid_cols)
+        if counts is None:
+            return None, False
+        
+        reduced = self.motion.reduced
+        mask = counts > (self.sensitivity if reduced is None else reduced.sensitivity(self.sensitivity))
+        if self.recorder is not None:
+            # Counts are recorded in full-resolution pixels whatever pipeline produced them
+            self.recorder.record(self.total_frames, time.monotonic(), mask,
+                                 counts if reduced is None else reduced.full_counts(counts))
+        return mask, audit
+
+    def decode_motion(self, mask, frame=None, audit=False):
+        """Apply quantum logic for the mask's active cells; headless runs skip the highlights"""
+        motion_frames = self.motion_frame_count
+        with self.timer('decode'):
+            self.apply_motion_mask(mask, None if self.headless else frame)
+        if audit:
+            self.motion.gate.record_audit(self.motion_frame_count > motion_frames)
+
+    def process_counts(self, counts, current_frame=None):
+        """Apply per-cell motion counts computed by a shared front end"""
+        self.total_frames += 1
+        with self.timer('decode'):
+            self.apply_motion_mask(counts > self.sensitivity, current_frame)
+        self.display_status()
+
+    def apply_motion_mask(self, mask, current_frame=None):
+        """Apply quantum logic and highlighting for every active cell in the mask"""
+        if not self.running or not mask.any():
+            return
         
-        height, width = thresh.shape
-        quadrant_width = width // 16
-        quadrant_height = height // 8
+        self.motion_frame_count += 1
+        if current_frame is not None:
+            quadrant_height, quadrant_width = cell_bounds(current_frame.shape, *mask.shape)
         
-        for row in range(8):
-            for col in range(16):
+        cells = list(active_cells(mask))
+        self.active_quadrants.update(cells)
+        self.apply_frame(cells)
+        if current_frame is not None:
+            for row, col in cells:
                 x1 = col * quadrant_width
                 y1 = row * quadrant_height
-                x2 = (col + 1) * quadrant_width
-                y2 = (row + 1) * quadrant_height
-                
-                quadrant = thresh[y1:y2, x1:x2]
-                motion_detected = np.sum(quadrant > 10) > self.sensitivity
-                
-                if motion_detected:
-                    motion_detected_in_frame = True
-                    self.active_quadrants.add((row, col))
-                    self.apply_quantum_logic(row, col)
-                    self.highlight_quadrant(current_frame, x1, y1, x2, y2)
-        
-        if motion_detected_in_frame:
-            self.motion_frame_count += 1
+                self.highlight_quadrant(current_frame, x1, y1, x1 + quadrant_width, y1 + quadrant_height)
 
     def highlight_quadrant(self, frame, x1, y1, x2, y2):
         """Highlight a quadrant with motion"""
         cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 0, 0), 2)
 
+    def apply_frame(self, cells, timestamp=None):
+        """Advance the quantum state over one frame's active (row, col) cells in one pass.
+        
+        Gives exactly the result of apply_quantum_logic for each cell in
+        order with the time fixed for the frame: self.monotonic() is read
+        once (or `timestamp` is used), and check_quantum_states only runs
+        for cells where it can change something, i.e. a counter is above
+        `corr` or an OR state is still open.
+        """
+        now = self.monotonic() if timestamp is None else timestamp
+        low, high = self.band
+        corr = self.corr
+        for b, bb in cells:
+            if self.Do == 1:
+                self.Do2 = 1
+                if self.qu == 1:
+                    self.qu = 0
+                elif self.qu == 0:
+                    self.qu = 1
+            
+            in_row, in_col = low < b < high, low < bb < high
+            if in_row or in_col:
+                self.or_count += 1
+                if in_row and in_col:
+                    self.and_count += 1
+                    if self.Do == 1:
+                        self.toggle_quantum_state()
+            
+            if self.or_count > corr or self.and_count > corr or self.last_or_state_time is not None:
+                with self.timer('check_quantum_states'):
+                    self.check_quantum_states(now)
+                if not self.running:
+                    return
+
     def apply_quantum_logic(self, b, bb):
         """Apply quantum state logic based on motion detection"""
         if self.Do == 1:
@@ -278,15 +430,17 @@ class QuantumCommunicator:
                 self.it += 1
             self.it = 0
             
-        if 4 < b < 11 or 4 < bb < 11:
+        low, high = self.band
+        if low < b < high or low < bb < high:
             self.or_count += 1
             
-        if 4 < b < 11 and 4 < bb < 11:
+        if low < b < high and low < bb < high:
             self.and_count += 1
             if self.Do == 1:
                 self.toggle_quantum_state()
                 
-        self.check_quantum_states()
+        with self.timer('check_quantum_states'):
+            self.check_quantum_states()
 
     def toggle_quantum_state(self):
         """Toggle quantum state based on current conditions"""
@@ -298,25 +452,22 @@ class QuantumCommunicator:
             self.it += 1
         self.it = 0
 
-    def check_quantum_states(self):
-        """Check and process quantum states"""
-        check = self.numa.split(",")
-        current_time = datetime.now()
+    def check_quantum_states(self, now=None):
+        """Check and process quantum states; `now` is a self.monotonic() reading"""
+        check = self.numa
+        now = self.monotonic() if now is None else now
         
         # Process OR states
         if self.or_count > self.corr and self.cyc < len(check):
             if self.last_or_state_time is None:
-                self.last_or_state_time = current_time
-                self.ghost_messages.append(f"OR state initiated at {current_time.strftime('%H:%M:%S')}")
+                self.last_or_state_time = now
+                self.ghost_messages.append(f"OR state initiated at {self.clock().strftime('%H:%M:%S')}")
             
-            or_duration = (current_time - self.last_or_state_time).total_seconds()
+            or_duration = now - self.last_or_state_time
             
-            if check[self.cyc] != str(self.qu):
+            if check[self.cyc] != self.qu:
                 if self.swi == self.longcyc:
-                    # Initialize the seed using the current time
-                    seed = int(time.time())
-                    random.seed(seed)
-                    self.qu = np.random.randint(0, 2)
+                    self.qu = int(self.rng.integers(0, 2))
                     self.swi = 0
                 self.swi += 1
                 self.Do = 1
@@ -331,9 +482,11 @@ class QuantumCommunicator:
                     self.ghost_messages.append(message)
                 
                 self.process_ghost_protocol()
+                if not self.running:
+                    return
         else:
             if self.last_or_state_time is not None:
-                or_duration = (current_time - self.last_or_state_time).total_seconds()
+                or_duration = now - self.last_or_state_time
                 if or_duration >= self.or_state_threshold:
                     self.ghost_messages.append(f"OR state ended after {or_duration:.2f}s")
             self.last_or_state_time = None
@@ -341,17 +494,14 @@ class QuantumCommunicator:
         # Process AND states
         if self.and_count > self.corr and self.cyc < len(check):
             if self.last_and_state_time is None:
-                self.last_and_state_time = current_time
-                self.ghost_messages.append(f"AND state initiated at {current_time.strftime('%H:%M:%S')}")
+                self.last_and_state_time = now
+                self.ghost_messages.append(f"AND state initiated at {self.clock().strftime('%H:%M:%S')}")
             
-            and_duration = (current_time - self.last_and_state_time).total_seconds()
+            and_duration = now - self.last_and_state_time
             
-            if check[self.cyc] == str(self.qu):
+            if check[self.cyc] == self.qu:
                 if self.swi == self.longcyc:
-                    # Initialize the seed using the current time
-                    seed = int(time.time())
-                    random.seed(seed)
-                    self.qu = np.random.randint(0, 2)
+                    self.qu = int(self.rng.integers(0, 2))
                     self.swi = 0
                     self.prime = 0
                 self.swi += 1
@@ -378,14 +528,17 @@ class QuantumCommunicator:
             if self.GhostIterate == 0:
                 self.ghostprotocollast = current_value
                 self.GhostIterate += 1
-                current_time = datetime.now()
+                current_time = self.clock()
                 message = f"Ghost Protocol Initiated: {self.ghostprotocol} (Value: {current_value}), Time: {current_time.strftime('%H:%M:%S')}"
                 self.ghost_messages.append(message)
                 self.last_ghost_check = current_value
                 
                 # Log initialization
-                with open("ack_stats.log", "a") as f:
-                    f.write(f"{current_time.strftime('%Y-%m-%d %H:%M:%S')}, GHOST PROTOCOL INITIALIZED, Value: {current_value}\n")
+                self.log.write({
+                    'event': 'ghost_protocol_initialized',
+                    'time': current_time.isoformat(timespec='seconds'),
+                    'value': current_value,
+                })
             
             if current_value != self.ghostprotocollast:
                 msg = f"Protocol state: {current_value}"
@@ -393,36 +546,47 @@ class QuantumCommunicator:
                 self.ghostprotocollast = current_value
         self.ghostprotocol -= 1
         if self.ghostprotocol <= 0:
-            exit()
+            # End of the run; the caller stops at the next check
+            self.running = False
     
 def send_message(self):
         """Send a quantum message when conditions are met, could be a message or math."""
         problem = self.PIN # enter any math problem to solve
         if problem <= self.ghostprotocol * self.range :
-            self.numa += ",".join('9' for _ in range(500)) #Paradox disruption
+            self.numa.append_sentinels(500) #Paradox disruption
 
 if __name__ == "__main__":
+    from runtime import run
+    from metrics import MetricsServer
+    from checkpoint import Checkpointer
+    
+    # Create logs directory if it doesn't exist
+    if not os.path.exists('logs'):
+        os.makedirs('logs')
+    
+    # Initialize the communicator
+    communicator = QuantumCommunicator(sensitivity=1500)
+    communicator.checkpointer = Checkpointer(communicator)
     try:
-        # Create logs directory if it doesn't exist
-        if not os.path.exists('logs'):
-            os.makedirs('logs')
-            
-        # Initialize the communicator
-        communicator = QuantumCommunicator(sensitivity=1500)
-        print("Quantum Communicator initialized. Starting camera feed...")
-        
-        # Start processing
-        communicator.process_camera()
-        
-    except KeyboardInterrupt:
-        print("\nShutting down gracefully...")
+        if communicator.checkpointer.resume() is not None:
+            print(f"Resumed from {communicator.checkpointer.path} at cycle {communicator.cyc}.")
+    except (ValueError, OSError, KeyError, TypeError) as e:
+        # A damaged or foreign checkpoint must not stop the decoder; apply() leaves no partial state
+        print(f"Checkpoint {communicator.checkpointer.path} ignored ({e}); starting fresh.")
+    print(f"Quantum Communicator initialized (seed {communicator.seed}). Starting camera feed...")
+    
+    # Runs until SIGINT/SIGTERM, 'q' or the end of the ghost protocol; the runner cleans up
+    # Prometheus-style text on http://127.0.0.1:9108/metrics while running; optional
+    metrics = MetricsServer(communicator)
+    try:
+        metrics.start()
+    except OSError as e:
+        print(f"Metrics disabled, port {metrics.port} unavailable: {e}")
+    try:
+        run(communicator)
     except Exception as e:
         print(f"An error occurred: {str(e)}")
-    finally:
-        # Clean up
-        if hasattr(communicator, 'capture'):
-            communicator.capture.release()
-        cv2.destroyAllWindows()
-        communicator.plot_ack_data()
-
-        print("Shutdown complete.")
+    metrics.stop()
+    communicator.plot_ack_data()
+    
+    print("Shutdown complete.")
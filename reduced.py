@@ -0,0 +1,204 @@
+import json
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+from grid import scan_grid, cell_bounds
+
+
+class ReducedPipeline:
+    """Blur/diff/grid-scan on a pyramid-downscaled frame and optionally only the band cross.
+
+    `levels` applies cv2.pyrDown that many times (each halves width and
+    height); the 21x21 blur kernel shrinks with it.  With `roi` only the
+    band rows (all columns) and band columns (all rows) are blurred and
+    scanned, padded by the kernel radius so those cells match a full-frame
+    blur; every other cell reports zero.  Cells outside the cross still
+    toggle qu in apply_quantum_logic, so `roi` is lossy; see validate().
+    """
+
+    def __init__(self, levels=1, roi=False, rows=8, cols=16, band=(4, 11)):
+        self.levels = levels
+        self.roi = roi
+        self.rows = rows
+        self.cols = cols
+        self.band = band
+        self.kernel = max(3, (21 >> levels) | 1)
+        self.previous = None
+        self.deferred = None
+        self.full_shape = None
+        self.shape = None
+
+    def reduce(self, gray):
+        for _ in range(self.levels):
+            gray = cv2.pyrDown(gray)
+        return gray
+
+    def sensitivity(self, sensitivity):
+        """Rescale a full-resolution per-cell pixel count to the reduced cell area"""
+        if self.full_shape is None:
+            return sensitivity
+        full_h, full_w = cell_bounds(self.full_shape, self.rows, self.cols)
+        cell_h, cell_w = cell_bounds(self.shape, self.rows, self.cols)
+        return sensitivity * (cell_h * cell_w) / (full_h * full_w)
+
+    def full_counts(self, counts):
+        """Rescale reduced per-cell counts to full-resolution pixels, e.g. for an event file"""
+        full_h, full_w = cell_bounds(self.full_shape, self.rows, self.cols)
+        cell_h, cell_w = cell_bounds(self.shape, self.rows, self.cols)
+        return np.rint(counts * ((full_h * full_w) / (cell_h * cell_w))).astype(counts.dtype)
+
+    def regions(self):
+        """(y1, y2, x1, x2, row0, col0, rows, cols) for each area to process"""
+        cell_h, cell_w = cell_bounds(self.shape, self.rows, self.cols)
+        if not self.roi:
+            return [(0, self.rows * cell_h, 0, self.cols * cell_w, 0, 0, self.rows, self.cols)]
+        low, high = self.band
+        band_rows = [row for row in range(self.rows) if low < row < high]
+        band_cols = [col for col in range(self.cols) if low < col < high]
+        regions = []
+        if band_rows:
+            r0, r1 = band_rows[0], band_rows[-1] + 1
+            regions.append((r0 * cell_h, r1 * cell_h, 0, self.cols * cell_w, r0, 0, r1 - r0, self.cols))
+        if band_cols:
+            c0, c1 = band_cols[0], band_cols[-1] + 1
+            regions.append((0, self.rows * cell_h, c0 * cell_w, c1 * cell_w, 0, c0, self.rows, c1 - c0))
+        return regions
+
+    def blur(self, gray):
+        """Blur each processed region of an already reduced frame"""
+        pad = self.kernel // 2
+        height, width = gray.shape[:2]
+        blurred = []
+        for y1, y2, x1, x2, *_ in self.regions():
+            py1, py2 = max(0, y1 - pad), min(height, y2 + pad)
+            px1, px2 = max(0, x1 - pad), min(width, x2 + pad)
+            region = cv2.GaussianBlur(gray[py1:py2, px1:px2], (self.kernel, self.kernel), 0)
+            blurred.append(region[y1 - py1:y2 - py1, x1 - px1:x2 - px1])
+        return blurred
+
+    def defer(self, gray):
+        """Keep a skipped raw frame; it is reduced and blurred only if the next frame needs it"""
+        self.deferred = gray.copy()
+
+    def counts(self, gray):
+        """Return the full (rows, cols) count matrix for this frame, or None for the first frame"""
+        self.full_shape = gray.shape
+        reduced = self.reduce(gray)
+        self.shape = reduced.shape
+        if self.deferred is not None:
+            self.previous = self.blur(self.reduce(self.deferred))
+            self.deferred = None
+        current = self.blur(reduced)
+        previous, self.previous = self.previous, current
+        if previous is None:
+            return None
+
+        counts = np.zeros((self.rows, self.cols), dtype=np.intp)
+        for (y1, y2, x1, x2, row0, col0, rows, cols), old, new in zip(self.regions(), previous, current):
+            thresh = cv2.threshold(cv2.absdiff(old, new), 25, 255, cv2.THRESH_BINARY)[1]
+            region_counts, _ = scan_grid(thresh, rows, cols)
+            counts[row0:row0 + rows, col0:col0 + cols] = region_counts
+        return counts
+
+
+class _MaskLog:
+    """In-memory stand-in for events.EventRecorder"""
+
+    def __init__(self):
+        self.masks = []
+
+    def record(self, frame_index, timestamp, mask, counts=None):
+        self.masks.append(mask.copy())
+
+
+def validate(path, levels=1, roi=False, decoder="qubox", sensitivity=None, seed=0, limit=None):
+    """Decode one source at full and reduced resolution and compare masks and ACK/NUL streams"""
+    from replay import open_source, load_decoder
+    from logwriter import LogWriter
+
+    communicator_class = load_decoder(decoder)
+    kwargs = {} if sensitivity is None else {'sensitivity': sensitivity}
+    runs = {}
+    for name in ("full", "reduced"):
+        communicator = communicator_class(headless=True, seed=seed, **kwargs)
+        communicator.log = LogWriter(None)
+        communicator.status_update_interval = float('inf')
+        communicator.motion.gate = None  # Compare the pipelines alone
+        communicator.recorder = _MaskLog()
+        if name == "reduced":
+            communicator.motion.reduced = ReducedPipeline(levels, roi, communicator.grid_rows,
+                                                          communicator.grid_cols, communicator.band)
+        runs[name] = {'communicator': communicator, 'decisions': [], 'elapsed': 0.0}
+
+    source = open_source(path)
+    frames = 0
+    while limit is None or frames < limit:
+        ret, frame = source.read()
+        if not ret:
+            break
+        frames += 1
+        for run in runs.values():
+            communicator = run['communicator']
+            if not communicator.running:
+                continue
+            ack, nul = communicator.ack, communicator.nul
+            began = time.perf_counter()
+            communicator.process_frame(frame.copy())
+            run['elapsed'] += time.perf_counter() - began
+            run['decisions'].append(("A" * (communicator.ack - ack)) + ("N" * (communicator.nul - nul)))
+    source.release()
+
+    full, reduced = runs["full"], runs["reduced"]
+    full_masks = np.array(full['communicator'].recorder.masks)
+    reduced_masks = np.array(reduced['communicator'].recorder.masks)
+    compared = min(len(full_masks), len(reduced_masks))
+    full_masks, reduced_masks = full_masks[:compared], reduced_masks[:compared]
+    true_positive = int(np.count_nonzero(full_masks & reduced_masks))
+    false_positive = int(np.count_nonzero(~full_masks & reduced_masks))
+    false_negative = int(np.count_nonzero(full_masks & ~reduced_masks))
+
+    full_stream, reduced_stream = "".join(full['decisions']), "".join(reduced['decisions'])
+    prefix = next((index for index, (a, b) in enumerate(zip(full_stream, reduced_stream)) if a != b),
+                  min(len(full_stream), len(reduced_stream)))
+    divergence = next((index for index, (a, b) in enumerate(zip(full['decisions'], reduced['decisions'])) if a != b), None)
+
+    return {
+        'source': path,
+        'decoder': decoder,
+        'levels': levels,
+        'roi': roi,
+        'frames': frames,
+        'cells': {
+            'true_positive': true_positive,
+            'false_positive': false_positive,
+            'false_negative': false_negative,
+            'precision': round(true_positive / (true_positive + false_positive), 4) if true_positive + false_positive else 1.0,
+            'recall': round(true_positive / (true_positive + false_negative), 4) if true_positive + false_negative else 1.0,
+            'identical_frames': int(np.all(full_masks == reduced_masks, axis=(1, 2)).sum()) if compared else 0,
+        },
+        'full': {'ack': full['communicator'].ack, 'nul': full['communicator'].nul,
+                 'fps': round(frames / full['elapsed'], 1) if full['elapsed'] else 0},
+        'reduced': {'ack': reduced['communicator'].ack, 'nul': reduced['communicator'].nul,
+                    'fps': round(frames / reduced['elapsed'], 1) if reduced['elapsed'] else 0},
+        'stream_match_prefix': prefix,
+        'stream_length': max(len(full_stream), len(reduced_stream)),
+        'first_divergent_frame': divergence,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare reduced-resolution/ROI decoding against full resolution")
+    parser.add_argument("source", help="video file, image directory or .npy stack")
+    parser.add_argument("--levels", type=int, default=1)
+    parser.add_argument("--roi", action="store_true")
+    parser.add_argument("--decoder", choices=("qubox", "comms"), default="qubox")
+    parser.add_argument("--sensitivity", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--frames", type=int)
+    args = parser.parse_args()
+
+    report = validate(args.source, args.levels, args.roi, args.decoder, args.sensitivity, args.seed, args.frames)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,155 @@
+import os
+import time
+import argparse
+import cv2
+import numpy as np
+
+from events import EventRecorder
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv')
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+
+
+class VideoFileSource:
+    """Replay frames from a recorded video file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise IOError(f"Cannot open video file: {path}")
+
+    def read(self, image=None):
+        return self.capture.read(image)
+
+    def release(self):
+        self.capture.release()
+
+
+class FrameDirectorySource:
+    """Replay image files from a directory in sorted filename order"""
+
+    def __init__(self, path):
+        self.path = path
+        self.files = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self.index = 0
+
+    def read(self, image=None):
+        while self.index < len(self.files):
+            frame = cv2.imread(self.files[self.index])
+            self.index += 1
+            if frame is not None:
+                return True, _into(image, frame)
+        return False, None
+
+    def release(self):
+        self.index = len(self.files)
+
+
+class NpyStackSource:
+    """Replay a (frames, height, width[, 3]) uint8 stack saved with np.save"""
+
+    def __init__(self, path):
+        self.path = path
+        self.stack = np.load(path, mmap_mode='r')
+        if self.stack.ndim not in (3, 4):
+            raise ValueError(f"Expected a stack of frames, got shape {self.stack.shape}")
+        self.index = 0
+
+    def read(self, image=None):
+        if self.index >= len(self.stack):
+            return False, None
+        frame = self.stack[self.index]
+        self.index += 1
+        return True, _into(image, frame)
+
+    def release(self):
+        self.index = len(self.stack)
+
+
+def _into(image, frame):
+    """Copy a frame into a caller-provided buffer when shapes match"""
+    if image is not None and image.shape == frame.shape and image.dtype == frame.dtype:
+        image[...] = frame
+        return image
+    return np.array(frame)
+
+
+def open_source(path):
+    """Open a video file, image directory or .npy stack as a frame source"""
+    if os.path.isdir(path):
+        return FrameDirectorySource(path)
+    if path.lower().endswith('.npy'):
+        return NpyStackSource(path)
+    if path.lower().endswith(VIDEO_EXTENSIONS):
+        return VideoFileSource(path)
+    raise ValueError(f"Unsupported replay source: {path}")
+
+
+def load_decoder(name):
+    """Return the QuantumCommunicator class for the named entry point"""
+    if name == "qubox":
+        import qubox
+        return qubox.QuantumCommunicator
+    if name == "comms":
+        import comms
+        return comms.QuantumCommunicator
+    raise ValueError(f"Unknown decoder: {name}")
+
+
+def replay(path, decoder="qubox", sensitivity=None, record=None, seed=None, **options):
+    """Feed a recorded source headlessly through the decoder pipeline and return a summary"""
+    communicator_class = load_decoder(decoder)
+    kwargs = {} if sensitivity is None else {'sensitivity': sensitivity}
+    communicator = communicator_class(capture=open_source(path), headless=True, seed=seed, **kwargs)
+    # Only the summary goes to stdout; pass status_update_interval to get the status view back
+    communicator.status_update_interval = float('inf')
+    for name, value in options.items():
+        setattr(communicator, name, value)
+    # Replay must not lose frames, so the producer waits for the decoder
+    communicator.ring.policy = "block"
+    if record:
+        communicator.recorder = EventRecorder(record, communicator.grid_rows, communicator.grid_cols, counts=True)
+        # Sweeps re-threshold the recorded counts, so every frame needs its real counts
+        communicator.motion.gate = None
+
+    start = time.perf_counter()
+    try:
+        communicator.process_camera()
+    finally:
+        if communicator.recorder is not None:
+            communicator.recorder.close()
+        communicator.log.close()
+        communicator.status.stop()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'source': path,
+        'decoder': decoder,
+        'frames': communicator.total_frames,
+        'motion_frames': communicator.motion_frame_count,
+        'ack': communicator.ack,
+        'nul': communicator.nul,
+        'cyc': communicator.cyc,
+        'elapsed': round(elapsed, 3),
+        'fps': round(communicator.total_frames / elapsed, 1) if elapsed > 0 else 0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded footage through the decoder without a camera or display")
+    parser.add_argument("sources", nargs="+", help="video files, image directories or .npy stacks")
+    parser.add_argument("--decoder", choices=("qubox", "comms"), default="qubox")
+    parser.add_argument("--sensitivity", type=int)
+    parser.add_argument("--record", help="also write per-frame active-cell masks to this event file (single source only)")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    if args.record and len(args.sources) > 1:
+        parser.error("--record takes a single source")
+
+    for source in args.sources:
+        summary = replay(source, args.decoder, args.sensitivity, args.record, args.seed)
+        print(", ".join(f"{key}: {value}" for key, value in summary.items()))
@@ -0,0 +1,211 @@
+import os
+import math
+import signal
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+
+class AsyncRunner:
+    """Run a communicator as cooperating asyncio tasks.
+
+    Capture reads and the OpenCV motion pipeline (``detect_motion``) run
+    on their own single-thread executors, so grabbing, blurring and
+    decoding overlap.  Decoding, the status view (which also queues the
+    ack_stats log records for the LogWriter thread), metrics export and
+    the preview window are tasks on the event loop, each on its own
+    cadence.  Frames move through bounded queues in order; a live camera
+    drops the oldest queued frame when the pipeline falls behind, a
+    recorded source waits instead.  The capture queue's counters replace
+    the communicator's ``capture_stats`` for the status view and metrics.
+
+    SIGINT/SIGTERM, 'q' in the preview window, the end of the source or
+    the communicator clearing ``running`` stop every task; the capture,
+    window, log and status thread are then released once.
+
+    Stage timings are dumped to `timings_path`, by default
+    ``logs/<decoder>-timings.json``; False disables the dump.
+    """
+
+    def __init__(self, communicator, queue_size=4, drop=None, display_interval=1 / 30,
+                 metrics_interval=5.0, timings_path=None):
+        self.communicator = communicator
+        self.queue_size = queue_size
+        self.drop = drop  # None: drop only when capturing from the camera
+        self.display_interval = display_interval
+        self.metrics_interval = metrics_interval
+        if timings_path is None:
+            timings_path = os.path.join('logs', f'{communicator.name}-timings.json')
+        self.timings_path = timings_path
+        self.exporters = []  # Callables run with the communicator on every metrics tick
+        self.capture_pool = ThreadPoolExecutor(1, thread_name_prefix="capture")
+        self.vision_pool = ThreadPoolExecutor(1, thread_name_prefix="vision")
+        self.stopping = None
+        self.error = None
+        self.latest = None  # Most recent decoded frame for the preview window
+        self.frames = None  # Capture queue
+
+        # Capture queue counters
+        self.captured = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def stop(self):
+        """Ask every task to finish; safe to call from signal handlers and tasks"""
+        if self.stopping is not None:
+            self.stopping.set()
+
+    def stats(self):
+        """Capture queue counters in the form of FrameRing.stats()"""
+        return {
+            'captured': self.captured,
+            'dropped': self.dropped,
+            'depth': self.frames.qsize() if self.frames is not None else 0,
+            'max_depth': self.max_depth,
+            'size': self.queue_size,
+            'policy': "drop-oldest" if self.drop else "block",
+        }
+
+    def interrupt(self):
+        print("\nShutting down gracefully...")
+        self.stop()
+
+    async def _guard(self, coroutine, final=True):
+        """Run one task; an error in any task, or a `final` task returning, stops the runner"""
+        try:
+            await coroutine
+        except Exception as e:
+            self.error = self.error or e
+            self.stop()
+        else:
+            if final:
+                self.stop()
+
+    async def capture_frames(self, frames):
+        loop = asyncio.get_running_loop()
+        capture = self.communicator.capture
+        while True:
+            ret, frame = await loop.run_in_executor(self.capture_pool, capture.read)
+            if not ret:
+                await frames.put(None)
+                return
+            if self.drop and frames.full():
+                frames.get_nowait()
+                self.dropped += 1
+            await frames.put(frame)
+            self.captured += 1
+            self.max_depth = max(self.max_depth, frames.qsize())
+
+    async def detect(self, frames, masks):
+        loop = asyncio.get_running_loop()
+        while True:
+            frame = await frames.get()
+            if frame is None:
+                await masks.put(None)
+                return
+            mask, audit = await loop.run_in_executor(self.vision_pool, self.communicator.detect_motion, frame)
+            await masks.put((frame, mask, audit))
+
+    async def decode(self, masks):
+        communicator = self.communicator
+        while communicator.running:
+            item = await masks.get()
+            if item is None:
+                return
+            frame, mask, audit = item
+            if mask is not None:
+                communicator.decode_motion(mask, frame, audit)
+            self.latest = frame
+
+    async def status(self):
+        interval = self.communicator.status_update_interval
+        while True:
+            await asyncio.sleep(interval)
+            self.communicator.display_status()
+
+    async def metrics(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.metrics_interval)
+            if self.timings_path:
+                await loop.run_in_executor(None, self.communicator.timer.dump, self.timings_path)
+            for exporter in self.exporters:
+                exporter(self.communicator)
+
+    async def display(self):
+        shown = None
+        while True:
+            await asyncio.sleep(self.display_interval)
+            if self.latest is not None and self.latest is not shown:
+                shown = self.latest
+                cv2.imshow('Motion Detection', shown)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                return
+
+    async def run(self):
+        """Run until stopped; cleanup always happens here, errors from tasks are re-raised"""
+        loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.interrupt)
+            except (NotImplementedError, RuntimeError, ValueError):
+                pass  # No loop signal handlers here; Ctrl+C still ends asyncio.run
+        communicator = self.communicator
+        if communicator.capture is None:
+            communicator.capture = await loop.run_in_executor(self.capture_pool, cv2.VideoCapture, 0)
+            if self.drop is None:
+                self.drop = True
+
+        frames = self.frames = asyncio.Queue(self.queue_size)
+        masks = asyncio.Queue(self.queue_size)
+        communicator.capture_stats = self.stats
+        # Capture and detect hand the end of the source down the queues; decode ends the run
+        tasks = [asyncio.create_task(self._guard(self.capture_frames(frames), final=False)),
+                 asyncio.create_task(self._guard(self.detect(frames, masks), final=False))]
+        coroutines = [self.decode(masks)]
+        if math.isfinite(communicator.status_update_interval):
+            coroutines.append(self.status())
+        if math.isfinite(self.metrics_interval):
+            coroutines.append(self.metrics())
+        if not communicator.headless:
+            coroutines.append(self.display())
+        tasks += [asyncio.create_task(self._guard(coroutine)) for coroutine in coroutines]
+        try:
+            await self.stopping.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.remove_signal_handler(sig)
+                except (NotImplementedError, RuntimeError, ValueError):
+                    pass
+            self.close()
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+        """Release the executors, capture and window; write the last checkpoint; stop log and status"""
+        communicator = self.communicator
+        self.capture_pool.shutdown(wait=True)
+        self.vision_pool.shutdown(wait=True)
+        if communicator.capture is not None:
+            communicator.capture.release()
+        if not communicator.headless:
+            cv2.destroyAllWindows()
+        if self.timings_path:
+            communicator.timer.dump(self.timings_path)
+        if communicator.checkpointer is not None:
+            communicator.checkpointer.close()
+        communicator.log.close()
+        communicator.status.stop()
+
+
+def run(communicator, **options):
+    """Run the communicator with an AsyncRunner until it stops"""
+    runner = AsyncRunner(communicator, **options)
+    asyncio.run(runner.run())
+    return runner
@@ -0,0 +1,87 @@
+import os
+import numpy as np
+
+SENTINEL = 9
+
+
+class NumaSequence:
+    """Growable uint8 reference sequence with O(1) indexed lookup"""
+
+    def __init__(self, values, capacity=None):
+        values = np.asarray(values, dtype=np.uint8)
+        self.length = len(values)
+        if capacity is None or capacity <= self.length:
+            # Share the array (possibly memory-mapped); the first append copies it
+            self.buffer = values
+        else:
+            self.buffer = np.empty(capacity, dtype=np.uint8)
+            self.buffer[:self.length] = values
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.buffer[:self.length][index]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("sequence index out of range")
+        return int(self.buffer[index])
+
+    def __array__(self, dtype=None, copy=None):
+        values = self.buffer[:self.length]
+        if dtype is not None and np.dtype(dtype) != values.dtype:
+            if copy is False:
+                raise ValueError("Converting the sequence to another dtype needs a copy")
+            return values.astype(dtype)
+        return values.copy() if copy else values
+
+    def _reserve(self, size):
+        """Grow the backing buffer geometrically so appends stay amortized O(1)"""
+        if size <= len(self.buffer):
+            return
+        grown = np.empty(max(size, 2 * len(self.buffer), 16), dtype=np.uint8)
+        grown[:self.length] = self.buffer[:self.length]
+        self.buffer = grown
+
+    def extend(self, values):
+        """Append values in place without rebuilding the existing sequence"""
+        values = np.asarray(values, dtype=np.uint8)
+        end = self.length + len(values)
+        self._reserve(end)
+        self.buffer[self.length:end] = values
+        self.length = end
+
+    def append_sentinels(self, count=500):
+        """Append `count` paradox sentinels used by send_message"""
+        end = self.length + count
+        self._reserve(end)
+        self.buffer[self.length:end] = SENTINEL
+        self.length = end
+
+    def __str__(self):
+        return ",".join(map(str, self.buffer[:self.length].tolist()))
+
+
+def generate_numa(length=100000, seed=None, cache_dir=None):
+    """Draw a 0/1 reference sequence in one vectorized call from a seeded Generator.
+
+    With `cache_dir` the draw is saved as ``numa-<seed>-<length>.npy``
+    and later runs with the same seed and length memory-map it instead
+    of drawing again.  Caching needs an explicit seed.
+    """
+    if cache_dir is None:
+        return NumaSequence(np.random.default_rng(seed).integers(0, 2, length, dtype=np.uint8))
+    if seed is None:
+        raise ValueError("generate_numa needs a seed to cache the sequence")
+
+    path = os.path.join(cache_dir, f"numa-{seed}-{length}.npy")
+    if not os.path.exists(path):
+        os.makedirs(cache_dir, exist_ok=True)
+        values = np.random.default_rng(seed).integers(0, 2, length, dtype=np.uint8)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "wb") as f:
+            np.save(f, values)
+        os.replace(temp, path)
+    return NumaSequence(np.load(path, mmap_mode='r'))
@@ -0,0 +1,84 @@
+import os
+import sys
+import threading
+
+
+class StatusRenderer:
+    """Redraw a block of status lines in place with ANSI cursor control.
+
+    Only lines that changed since the previous frame are rewritten, and
+    each redraw is a single buffered write.  With ``threaded=True`` the
+    caller only submits the latest lines and a background thread does
+    the terminal I/O, so a slow terminal never blocks the capture loop.
+    When the stream is not a terminal the block is written plainly.
+    """
+
+    def __init__(self, stream=None, threaded=False):
+        self.stream = stream or sys.stdout
+        self.ansi = self.stream.isatty()
+        if self.ansi and os.name == 'nt':
+            os.system('')  # Enables VT escape processing on Windows consoles
+        self.previous = None
+        self.threaded = threaded
+        self.pending = None
+        self.event = threading.Event()
+        self.thread = None
+        self.running = False
+
+    def render(self, lines):
+        """Draw the given lines now, rewriting only those that changed"""
+        lines = "\n".join(lines).split("\n")
+        if not self.ansi:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+            return
+
+        parts = []
+        previous = self.previous
+        if previous is None:
+            parts.append("\x1b[2J")
+            previous = []
+        for row, line in enumerate(lines):
+            if row >= len(previous) or previous[row] != line:
+                parts.append(f"\x1b[{row + 1};1H{line}\x1b[K")
+        for row in range(len(lines), len(previous)):
+            parts.append(f"\x1b[{row + 1};1H\x1b[K")
+        parts.append(f"\x1b[{len(lines) + 1};1H")
+        self.stream.write("".join(parts))
+        self.stream.flush()
+        self.previous = lines
+
+    def submit(self, lines):
+        """Render on the background thread when threaded, otherwise immediately"""
+        if not self.threaded:
+            self.render(lines)
+            return
+        if self.thread is None:
+            self.start()
+        self.pending = lines
+        self.event.set()
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="StatusRenderer", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while self.running:
+            self.event.wait()
+            self.event.clear()
+            lines, self.pending = self.pending, None
+            if lines is not None:
+                self.render(lines)
+
+    def stop(self):
+        """Stop the render thread after drawing any pending lines"""
+        if self.thread is None:
+            return
+        self.running = False
+        self.event.set()
+        self.thread.join()
+        self.thread = None
+        if self.pending is not None:
+            self.render(self.pending)
+            self.pending = None
@@ -0,0 +1,208 @@
+import os
+import time
+import queue
+import argparse
+import multiprocessing
+
+from logwriter import LogWriter
+from status import StatusRenderer
+
+STATS_INTERVAL = 1.0
+RESTART_DELAY = 2.0  # Doubled after each consecutive failure
+MAX_FAILURES = 5  # Consecutive failures before a worker is given up on
+STABLE_AFTER = 60.0  # Seconds of uptime that reset a worker's failure count
+
+
+def open_capture(source):
+    """Open a camera index or a replay source path"""
+    if isinstance(source, int):
+        import cv2
+        return cv2.VideoCapture(source)
+    from replay import open_source
+    return open_source(source)
+
+
+def worker_main(name, source, decoder, sensitivity, core, stats):
+    """Run one headless communicator on one source, reporting stats to the supervisor"""
+    if core is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {core})
+
+    from replay import load_decoder
+    from capture import threaded_frames, direct_frames
+
+    kwargs = {} if sensitivity is None else {'sensitivity': sensitivity}
+    communicator = load_decoder(decoder)(capture=open_capture(source), headless=True, **kwargs)
+    communicator.log = LogWriter(os.path.join('logs', f'{name}.jsonl'))
+    communicator.status = StatusRenderer(open(os.devnull, "w"))
+    if not isinstance(source, int):
+        communicator.ring.policy = "block"
+
+    frames = threaded_frames(communicator.capture, communicator.ring) if communicator.threaded_capture \
+        else direct_frames(communicator.capture)
+    started = last_report = time.monotonic()
+    reported_frames = 0
+
+    def report(now):
+        stats.put({
+            'name': name,
+            'pid': os.getpid(),
+            'core': core,
+            'frames': communicator.total_frames,
+            'fps': round((communicator.total_frames - reported_frames) / max(now - last_report, 1e-9), 1),
+            'motion_frames': communicator.motion_frame_count,
+            'ack': communicator.ack,
+            'nul': communicator.nul,
+            'cyc': communicator.cyc,
+            'dropped': communicator.ring.dropped,
+            'uptime': round(now - started, 1),
+        })
+
+    try:
+        for frame in frames:
+            communicator.process_frame(frame)
+            if not communicator.running:
+                break
+            now = time.monotonic()
+            if now - last_report >= STATS_INTERVAL:
+                report(now)
+                last_report, reported_frames = now, communicator.total_frames
+        report(time.monotonic())
+    finally:
+        frames.close()
+        communicator.capture.release()
+        communicator.log.close()
+
+
+class Supervisor:
+    """Start one worker process per source, restart crashed workers and aggregate their stats"""
+
+    def __init__(self, sources, decoder="qubox", sensitivity=None, pin_cores=True):
+        self.sources = sources
+        self.decoder = decoder
+        self.sensitivity = sensitivity
+        self.stats = multiprocessing.Queue()
+        self.workers = {}
+        self.latest = {}
+        self.restarts = {}
+        self.failures = {}  # Consecutive failures per worker
+        self.started = {}
+        self.finished = set()
+        self.failed = set()
+        self.restart_at = {}
+        cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+        self.cores = {
+            self.name(index): (cores[index % len(cores)] if pin_cores and cores else None)
+            for index in range(len(sources))
+        }
+        self.status = StatusRenderer()
+
+    def name(self, index):
+        source = self.sources[index]
+        return f"cam{source}" if isinstance(source, int) else f"src{index}"
+
+    def start(self, index):
+        name = self.name(index)
+        process = multiprocessing.Process(
+            target=worker_main,
+            args=(name, self.sources[index], self.decoder, self.sensitivity, self.cores[name], self.stats),
+            name=name,
+            daemon=True,
+        )
+        process.start()
+        self.workers[name] = (index, process)
+        self.started[name] = time.monotonic()
+
+    def check_workers(self):
+        """Restart workers that died with an error, with exponential backoff.
+
+        Workers that exit cleanly are done; a worker that fails
+        MAX_FAILURES times in a row without staying up for STABLE_AFTER
+        seconds is marked failed and not restarted again.
+        """
+        now = time.monotonic()
+        for name, (index, process) in list(self.workers.items()):
+            if process.is_alive() or name in self.finished or name in self.failed:
+                continue
+            if process.exitcode == 0:
+                self.finished.add(name)
+                continue
+            if name not in self.restart_at:
+                failures = 0 if now - self.started[name] >= STABLE_AFTER else self.failures.get(name, 0)
+                self.failures[name] = failures + 1
+                if self.failures[name] >= MAX_FAILURES:
+                    self.failed.add(name)
+                    continue
+            restart_at = self.restart_at.setdefault(name, now + RESTART_DELAY * 2 ** (self.failures[name] - 1))
+            if now >= restart_at:
+                del self.restart_at[name]
+                self.restarts[name] = self.restarts.get(name, 0) + 1
+                self.start(index)
+
+    def drain(self, timeout):
+        try:
+            record = self.stats.get(timeout=timeout)
+            while True:
+                self.latest[record['name']] = record
+                record = self.stats.get_nowait()
+        except queue.Empty:
+            pass
+
+    def lines(self):
+        lines = ["=" * 50, "QUANTUM COMMUNICATOR SESSIONS", "=" * 50]
+        total_ack = total_nul = total_fps = 0
+        for name, (index, process) in self.workers.items():
+            record = self.latest.get(name, {})
+            if name in self.finished:
+                state = "done"
+            elif name in self.failed:
+                state = f"failed ({process.exitcode})"
+            else:
+                state = "running" if process.is_alive() else "restarting"
+            lines.append(
+                f"{name:<8} {state:<10} core {self.cores[name]}  fps {record.get('fps', 0):6.1f}  "
+                f"frames {record.get('frames', 0):>8}  ACK {record.get('ack', 0):>6}  NUL {record.get('nul', 0):>6}  "
+                f"dropped {record.get('dropped', 0):>5}  restarts {self.restarts.get(name, 0)}"
+            )
+            total_ack += record.get('ack', 0)
+            total_nul += record.get('nul', 0)
+            total_fps += record.get('fps', 0) if process.is_alive() else 0
+        lines.append("-" * 50)
+        lines.append(f"TOTAL    fps {total_fps:6.1f}  ACK {total_ack}  NUL {total_nul}")
+        return lines
+
+    def run(self):
+        """Supervise until every worker has finished or failed, or the user interrupts"""
+        for index in range(len(self.sources)):
+            self.start(index)
+        try:
+            while len(self.finished) + len(self.failed) < len(self.workers):
+                self.drain(STATS_INTERVAL)
+                self.check_workers()
+                self.status.render(self.lines())
+            self.drain(0)
+            self.status.render(self.lines())
+        finally:
+            for index, process in self.workers.values():
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+
+
+def parse_source(text):
+    return int(text) if text.isdigit() else text
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run one communicator process per camera or recorded source")
+    parser.add_argument("sources", nargs="+", type=parse_source, help="camera indexes or replay paths")
+    parser.add_argument("--decoder", choices=("qubox", "comms"), default="qubox")
+    parser.add_argument("--sensitivity", type=int)
+    parser.add_argument("--no-pin", action="store_true", help="do not pin workers to cores")
+    args = parser.parse_args()
+
+    if not os.path.exists('logs'):
+        os.makedirs('logs')
+    try:
+        Supervisor(args.sources, args.decoder, args.sensitivity, not args.no_pin).run()
+    except KeyboardInterrupt:
+        print("\nShutting down gracefully...")
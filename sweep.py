@@ -0,0 +1,91 @@
+import os
+import csv
+import sys
+import json
+import time
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+from events import EventReplay
+from logwriter import LogWriter
+from replay import load_decoder
+
+# Communicator attributes a sweep may vary
+PARAMETERS = ('sensitivity', 'corr', 'longcyc', 'prime_threshold',
+              'or_state_threshold', 'and_state_threshold', 'band')
+
+_replay = None
+
+
+def _open(path):
+    global _replay
+    _replay = EventReplay(path)
+
+
+def evaluate(decoder, seed, params):
+    """Replay the worker's session under one parameter combination"""
+    communicator = load_decoder(decoder)(headless=True, seed=seed)
+    communicator.log = LogWriter(None)
+    sensitivity = params.get('sensitivity')
+    for name, value in params.items():
+        if name != 'sensitivity':
+            setattr(communicator, name, tuple(value) if name == 'band' else value)
+
+    began = time.perf_counter()
+    frames = _replay.run(communicator, sensitivity=sensitivity)
+    elapsed = time.perf_counter() - began
+
+    decided = communicator.ack + communicator.nul
+    return {
+        **params,
+        'frames': frames,
+        'motion_frames': communicator.motion_frame_count,
+        'ack': communicator.ack,
+        'nul': communicator.nul,
+        'ack_rate': round(communicator.ack / decided, 4) if decided else 0.0,
+        'cyc': communicator.cyc,
+        'ghost_protocol': communicator.ghostprotocol,
+        'ghost_initiated': communicator.GhostIterate > 0,
+        'ghost_exited': decoder == "qubox" and communicator.ghostprotocol <= 0,
+        'elapsed': round(elapsed, 3),
+    }
+
+
+def combinations(grid):
+    """Expand {name: [values]} into a list of {name: value} dicts"""
+    unknown = set(grid) - set(PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {', '.join(sorted(unknown))}")
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def sweep(path, grid, decoder="qubox", seed=0, workers=None):
+    """Fan every parameter combination out over a process pool; returns result rows"""
+    combos = combinations(grid)
+    workers = workers or os.cpu_count()
+    chunksize = max(1, len(combos) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_open, initargs=(path,)) as pool:
+        return list(pool.map(evaluate, itertools.repeat(decoder), itertools.repeat(seed), combos, chunksize=chunksize))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep decoder parameters over a recorded event session")
+    parser.add_argument("path", help="event file written by replay.py --record")
+    parser.add_argument("grid", help='JSON object of parameter lists, e.g. \'{"corr": [2, 3, 4], "band": [[4, 11], [3, 12]]}\'')
+    parser.add_argument("--decoder", choices=("qubox", "comms"), default="qubox")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--output", help="write the results table as CSV to this file instead of stdout")
+    args = parser.parse_args()
+
+    rows = sweep(args.path, json.loads(args.grid), args.decoder, args.seed, args.workers)
+    rows.sort(key=lambda row: row['ack_rate'], reverse=True)
+
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    writer = csv.DictWriter(output, fieldnames=list(rows[0]) if rows else [])
+    writer.writeheader()
+    writer.writerows(rows)
+    if args.output:
+        output.close()
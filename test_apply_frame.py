@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from benchmark import verify_batched, decoder_state
+from logwriter import LogWriter
+from replay import load_decoder
+
+
+@pytest.mark.parametrize("decoder", ["qubox", "comms"])
+@pytest.mark.parametrize("seed", range(4))
+def test_apply_frame_matches_per_cell(decoder, seed):
+    result = verify_batched(decoder, frames=1000, seed=seed)
+    assert result['first_mismatch'] is None
+
+
+def test_apply_frame_through_end_of_ghost_protocol():
+    # qubox counts the ghost protocol down from 3000 NUL decisions and then stops
+    result = verify_batched("qubox", frames=5000, seed=7)
+    assert result['first_mismatch'] is None
+    assert not result['running']
+    assert result['frames'] < 5000
+
+
+@pytest.mark.parametrize("decoder", ["qubox", "comms"])
+def test_empty_mask_leaves_state_unchanged(decoder):
+    communicator = load_decoder(decoder)(headless=True, seed=0)
+    communicator.log = LogWriter(None)
+    communicator.apply_frame([(5, 5)] * 5)
+    before = decoder_state(communicator)
+    communicator.apply_frame([])
+    communicator.apply_motion_mask(np.zeros((communicator.grid_rows, communicator.grid_cols), dtype=bool))
+    assert decoder_state(communicator) == before
+    assert communicator.motion_frame_count == 0
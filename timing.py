@@ -0,0 +1,108 @@
+import json
+import time
+from contextlib import nullcontext
+
+import numpy as np
+
+_DISABLED = nullcontext()
+
+
+class _Stage:
+    """Rolling window of recent durations for one pipeline stage"""
+
+    def __init__(self, window):
+        self.samples = np.zeros(window)
+        self.index = 0
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.samples[self.index] = seconds
+        self.index = (self.index + 1) % len(self.samples)
+        self.count += 1
+        if seconds > self.max:
+            self.max = seconds
+
+    def summary(self):
+        window = self.samples[:min(self.count, len(self.samples))] * 1000
+        p50, p95, p99 = np.percentile(window, (50, 95, 99))
+        return {
+            'count': self.count,
+            'p50': round(float(p50), 3),
+            'p95': round(float(p95), 3),
+            'p99': round(float(p99), 3),
+            'window_max': round(float(window.max()), 3),
+            'max': round(self.max * 1000, 3),
+        }
+
+
+class _Span:
+    """Reusable context manager recording into a single stage"""
+
+    __slots__ = ('stage', 'began')
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.began = 0.0
+
+    def __enter__(self):
+        self.began = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stage.add(time.perf_counter() - self.began)
+        return False
+
+
+class StageTimer:
+    """Per-stage hot-path timings with rolling p50/p95/p99 and max.
+
+    Use as ``with timer('blur'):`` or with ``start()``/``stop(stage, t)``
+    where a context manager does not fit.  When disabled both forms
+    return immediately without reading the clock.
+    """
+
+    def __init__(self, enabled=True, window=1024):
+        self.enabled = enabled
+        self.window = window
+        self.stages = {}
+        self.spans = {}
+
+    def _stage(self, name):
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = _Stage(self.window)
+            self.spans[name] = _Span(stage)
+        return stage
+
+    def __call__(self, name):
+        if not self.enabled:
+            return _DISABLED
+        span = self.spans.get(name)
+        if span is None:
+            self._stage(name)
+            span = self.spans[name]
+        return span
+
+    def start(self):
+        return time.perf_counter() if self.enabled else 0.0
+
+    def stop(self, name, began):
+        if self.enabled:
+            self._stage(name).add(time.perf_counter() - began)
+
+    def summary(self):
+        # Copied first: summaries may be requested from another thread while stages are added
+        return {name: stage.summary() for name, stage in list(self.stages.items()) if stage.count}
+
+    def lines(self):
+        """Format the summary as status-screen lines"""
+        return [
+            f"{name:<22} p50 {s['p50']:7.3f}  p95 {s['p95']:7.3f}  p99 {s['p99']:7.3f}  max {s['max']:7.3f} ms"
+            for name, s in self.summary().items()
+        ]
+
+    def dump(self, path):
+        """Write the summary to a JSON file"""
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)